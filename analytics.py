@@ -0,0 +1,202 @@
+"""Perhitungan analitik dasbor tanpa Streamlit: dataset + filter -> tabel rapi.
+
+Semua angka yang ditampilkan dashboard.py (KPI, deret Pemasukan / Pengeluaran / Laba,
+top lokasi, estimasi biaya perawatan armada, peringkat sopir) dihitung di sini dari kubus
+agregat dan tabel deret Dataset, sehingga bisa dipakai ulang oleh job terjadwal
+(reports.py) dan benchmark.py tanpa menjalankan Streamlit.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from cube import COUNT, MAX_VOLUME, build_cube, deliveries, located_orders, rollup, slice_cube, totals, value_counts
+from timeindex import date_range_rows, valid_rows
+from timeseries import LABA, PERIODE, SATUAN, date_day, series
+
+UNKNOWN = 'Tidak Diketahui'
+# Estimasi biaya perawatan armada sebagai bagian dari pengeluaran
+BIAYA_PERAWATAN = 0.15
+ESTIMASI_PERAWATAN = 'Estimasi Biaya Perawatan'
+
+
+class Selection(NamedTuple):
+    """Potongan data untuk satu kombinasi filter."""
+    filters: dict
+    # Kunci cache: filter dimensi ditambah posisi baris rentang tanggal (jika ada)
+    key: tuple
+    baris: slice
+    rentang_hari: tuple
+    cube: pd.DataFrame
+    kpi: dict
+
+
+def select(dataset, bulan=None, sopir=None, armada=None, rentang=None, range_cube=None):
+    """Potongan kubus untuk filter bulan / sopir / armada dan rentang tanggal (awal, akhir).
+
+    Rentang tanggal dipotong dari baris yang terurut lalu dibuat kubusnya lewat
+    `range_cube(start, stop)` (default: build_cube tanpa cache), kecuali jika rentang
+    mencakup semua baris bertanggal.
+    """
+    filters = {'Bulan': bulan, 'Sopir': sopir, 'Plat Nomor': armada}
+    key = tuple(filters.items())
+    if rentang is None:
+        baris, cube_waktu, rentang_hari = slice(None), dataset.df_cube, None
+    else:
+        tanggal = dataset.df_keuangan['Tanggal']
+        baris = date_range_rows(tanggal, *rentang)
+        if baris.start == 0 and baris.stop == valid_rows(tanggal.to_numpy()):
+            # Rentang mencakup semua baris bertanggal (mis. rentang default): kubus penuh
+            # tanpa sel bulan kosong, yaitu sel dari baris tanpa tanggal
+            cube_waktu = dataset.df_cube[dataset.df_cube['Bulan'].notna()]
+        elif range_cube is None:
+            cube_waktu = build_cube(dataset.df_keuangan.iloc[baris])
+        else:
+            cube_waktu = range_cube(baris.start, baris.stop)
+        key += (('Baris', (baris.start, baris.stop)),)
+        rentang_hari = (date_day(rentang[0]), date_day(rentang[1]))
+    cube = slice_cube(cube_waktu, filters)
+    return Selection(filters, key, baris, rentang_hari, cube, totals(cube))
+
+
+def selection_rows(df_keuangan, selection):
+    """Posisi baris transaksi yang diwakili potongan, tanpa menyalin barisnya."""
+    baris = df_keuangan.iloc[selection.baris]
+    mask = np.ones(len(baris), dtype=bool)
+    for dim, value in selection.filters.items():
+        if value is not None:
+            mask &= (baris[dim] == value).to_numpy(dtype=bool, na_value=False)
+    return (selection.baris.start or 0) + np.flatnonzero(mask)
+
+
+def tren(dataset, selection, freq, by=None):
+    """Deret Pemasukan, Pengeluaran, Laba Bersih dan Volume per periode untuk potongan ini."""
+    return series(dataset.deret, freq, selection.filters, selection.rentang_hari, by=by)
+
+
+# --- Ringkasan Keuangan & Pengiriman Air ---
+def ringkasan_kpi(kpi):
+    return {
+        'Total Pemasukan': kpi['Pemasukan'],
+        'Total Pengeluaran': kpi['Pengeluaran'],
+        LABA: kpi['Pemasukan'] - kpi['Pengeluaran'],
+        'Total Transaksi': kpi[COUNT],
+    }
+
+
+def pengiriman_kpi(kpi):
+    return {
+        'Total Volume Terkirim': kpi['Volume (L)'],
+        'Rata-rata Volume': kpi['Volume (L)'] / kpi[COUNT] if kpi[COUNT] else np.nan,
+        'Volume Terbesar': kpi[MAX_VOLUME],
+    }
+
+
+def lokasi_pengiriman(cube, df_lokasi, order_lokasi):
+    """Agregat per Order beserta koordinat, dan bagian pengirimannya yang berkoordinat."""
+    located = located_orders(cube, df_lokasi, order_lokasi)
+    return located, deliveries(located)
+
+
+def top_lokasi_volume(df_pengiriman, n=10):
+    tabel = rollup(df_pengiriman, 'Order')['Volume (L)'].sort_values(ascending=False).head(n).reset_index()
+    tabel.columns = ['Lokasi', 'Volume Air Terkirim (L)']
+    return tabel
+
+
+def top_lokasi_order(df_pengiriman, n=10):
+    tabel = value_counts(df_pengiriman, 'Order').head(n).reset_index()
+    tabel.columns = ['Lokasi', 'Jumlah Order']
+    return tabel
+
+
+# --- Analisis Armada ---
+def armada_valid(cube):
+    """Baris kubus dengan plat nomor yang dikenal (bukan 'Tidak Diketahui' atau '####')."""
+    plat = cube['Plat Nomor']
+    return cube[(plat != UNKNOWN) & (~plat.str.contains('####', na=False))]
+
+
+def frekuensi_armada(df_armada):
+    """Jumlah penggunaan per armada, terbanyak lebih dulu."""
+    tabel = value_counts(df_armada, 'Plat Nomor').reset_index()
+    tabel.columns = ['Armada', 'Jumlah Penggunaan']
+    return tabel
+
+
+def armada_kpi(df_armada, frekuensi):
+    return {
+        'Total Armada Aktif': len(frekuensi),
+        'Armada Terbanyak Digunakan': frekuensi['Armada'].iloc[0],
+        'Jumlah Penggunaan Tertinggi': frekuensi['Jumlah Penggunaan'].iloc[0],
+        'Total Volume Terangkut': df_armada['Volume (L)'].sum(),
+    }
+
+
+def biaya_perawatan(df_armada):
+    """Pemasukan, pengeluaran, volume dan estimasi biaya perawatan per armada, terbesar lebih dulu."""
+    tabel = rollup(df_armada, 'Plat Nomor')[['Pemasukan', 'Pengeluaran', 'Volume (L)']].reset_index()
+    tabel[ESTIMASI_PERAWATAN] = tabel['Pengeluaran'] * BIAYA_PERAWATAN
+    return tabel.sort_values(ESTIMASI_PERAWATAN, ascending=False)
+
+
+def rata_volume_armada(dataset, selection, freq, armada, satuan):
+    """Rata-rata volume per periode untuk setiap armada di `armada`, terbesar lebih dulu."""
+    per_periode = tren(dataset, selection, freq, by='Plat Nomor')
+    per_periode = per_periode[per_periode['Plat Nomor'].isin(armada)]
+    tabel = per_periode.groupby('Plat Nomor', observed=True)['Volume (L)'].mean().sort_values(ascending=False).reset_index()
+    tabel.columns = ['Armada', f'Rata-rata Volume per {satuan} (L)']
+    return tabel
+
+
+# --- Kinerja Sopir ---
+def sopir_valid(cube):
+    return cube[cube['Sopir'] != UNKNOWN]
+
+
+def tugas_sopir(df_sopir):
+    """Jumlah tugas per sopir, terbanyak lebih dulu."""
+    tabel = value_counts(df_sopir, 'Sopir').reset_index()
+    tabel.columns = ['Sopir', 'Jumlah Tugas']
+    return tabel
+
+
+def sopir_kpi(tugas):
+    return {
+        'Total Sopir Aktif': len(tugas),
+        'Sopir Terbaik': tugas['Sopir'].iloc[0],
+        'Jumlah Tugas': tugas['Jumlah Tugas'].iloc[0],
+    }
+
+
+def pemasukan_sopir(df_sopir):
+    tabel = rollup(df_sopir, 'Sopir')['Pemasukan'].sort_values(ascending=False).reset_index()
+    tabel.columns = ['Sopir', 'Total Pemasukan']
+    return tabel
+
+
+def peringkat_sopir(df_sopir):
+    """Tugas, pemasukan, laba dan volume semua sopir beserta peringkatnya (1 = terbaik)."""
+    stats = rollup(df_sopir, 'Sopir')[['Pemasukan', 'Pengeluaran', 'Volume (L)']]
+    tabel = tugas_sopir(df_sopir).join(stats, on='Sopir')
+    tabel[LABA] = tabel['Pemasukan'] - tabel['Pengeluaran']
+    for kolom in ['Jumlah Tugas', 'Pemasukan', LABA]:
+        tabel[f'Peringkat {kolom}'] = tabel[kolom].rank(method='min', ascending=False).astype(int)
+    return tabel
+
+
+def tab_tables(dataset, selection, freq):
+    """Semua tabel agregat halaman dasbor untuk potongan ini, berkunci nama tabel."""
+    satuan = SATUAN[freq]
+    _, df_pengiriman = lokasi_pengiriman(selection.cube, dataset.df_lokasi, dataset.order_lokasi)
+    df_armada = armada_valid(selection.cube)
+    frekuensi = frekuensi_armada(df_armada)
+    return {
+        f'Ringkasan per {satuan}': tren(dataset, selection, freq).drop(columns=PERIODE),
+        'Top Toko Volume': top_lokasi_volume(df_pengiriman),
+        'Top Lokasi Order': top_lokasi_order(df_pengiriman),
+        'Frekuensi Armada': frekuensi,
+        'Biaya Perawatan Armada': biaya_perawatan(df_armada),
+        'Rata-rata Volume Armada': rata_volume_armada(dataset, selection, freq, frekuensi['Armada'], satuan),
+        'Peringkat Sopir': peringkat_sopir(sopir_valid(selection.cube)),
+    }
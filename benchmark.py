@@ -0,0 +1,296 @@
+"""Benchmark headless untuk pipeline muat, bersihkan, filter dan agregasi per halaman.
+
+Contoh:
+    python benchmark.py --sizes 10000 100000 1000000 --output bench.json
+    python benchmark.py --sizes 10000 --format xlsx
+
+Hasil ditulis sebagai JSON (satu entri per ukuran data) agar bisa dibandingkan antar versi.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from analytics import (armada_kpi, armada_valid, biaya_perawatan, frekuensi_armada, lokasi_pengiriman, pemasukan_sopir,
+                       pengiriman_kpi, rata_volume_armada, ringkasan_kpi, select, sopir_kpi, sopir_valid, top_lokasi_order,
+                       top_lokasi_volume, tren, tugas_sopir)
+from cube import COUNT, build_cube, totals, value_counts
+from export import FORMATS, export_file
+from geoindex import build_location_index
+from locations import build_location_dim, order_location_ids
+from mapbins import level_of_detail, map_points
+from pipeline import XLSX_MAX_ROWS, clean_keuangan, read_workbook
+from quality import profile
+from snapshot import load_snapshot, save_snapshot
+from synthetic import generate_keuangan, generate_lokasi, read_parquet_dataset, write_dataset
+from timeindex import date_bounds, date_range_rows, week_bounds
+from timeseries import build_series, date_day, series
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+
+
+def current_rss_mb():
+    """RSS proses saat ini dalam MB (Linux); None jika tidak tersedia."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError):
+        return None
+
+
+class RssSampler(threading.Thread):
+    """Mencatat RSS tertinggi selama satu tahap dengan sampling berkala.
+
+    Dipakai sebagai pengganti tracemalloc yang memperlambat kode Python berkali-kali lipat
+    dan tidak melihat alokasi Arrow.
+    """
+
+    def __init__(self, interval=0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss_mb()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            rss = current_rss_mb()
+            if rss is not None and rss > self.peak:
+                self.peak = rss
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        rss = current_rss_mb()
+        if rss is not None and rss > self.peak:
+            self.peak = rss
+        return self.peak
+
+
+def measure(func, *args, repeat=1):
+    """Menjalankan func dan mengembalikan (hasil, detik rata-rata, RSS puncak dalam MB)."""
+    sampler = RssSampler()
+    if sampler.peak is not None:
+        sampler.start()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(*args)
+    elapsed = (time.perf_counter() - start) / repeat
+    peak = sampler.stop() if sampler.peak is not None else float('nan')
+    return result, elapsed, peak
+
+
+def filter_combinations(df_cube):
+    """Kombinasi filter yang mewakili pemakaian sidebar: semua, per bulan, sopir, armada dan gabungan."""
+    top_bulan = df_cube['Bulan'].dropna().iloc[0]
+    top_sopir = value_counts(df_cube, 'Sopir').index[0]
+    top_armada = value_counts(df_cube, 'Plat Nomor').index[0]
+    return [
+        {'Bulan': None, 'Sopir': None, 'Plat Nomor': None},
+        {'Bulan': top_bulan, 'Sopir': None, 'Plat Nomor': None},
+        {'Bulan': None, 'Sopir': top_sopir, 'Plat Nomor': None},
+        {'Bulan': None, 'Sopir': None, 'Plat Nomor': top_armada},
+        {'Bulan': top_bulan, 'Sopir': top_sopir, 'Plat Nomor': top_armada},
+    ]
+
+
+# Agregasi yang dihitung setiap halaman dasbor (granularitas bulanan), memakai analytics.py seperti dashboard.py
+def tab_ringkasan(sel, data):
+    ringkasan_kpi(sel.kpi)
+    tren(data, sel, 'M')
+
+
+def tab_pengiriman(sel, data):
+    pengiriman_kpi(sel.kpi)
+    tren(data, sel, 'M')
+    _, pengiriman = lokasi_pengiriman(sel.cube, data.df_lokasi, data.order_lokasi)
+    top_lokasi_volume(pengiriman)
+    level_of_detail(map_points(pengiriman))
+
+
+def tab_peta(sel, data):
+    _, pengiriman = lokasi_pengiriman(sel.cube, data.df_lokasi, data.order_lokasi)
+    value_counts(sel.cube, 'Jenis Transaksi')
+    top_lokasi_order(pengiriman)
+    level_of_detail(map_points(pengiriman))
+
+
+def tab_armada(sel, data):
+    armada = armada_valid(sel.cube)
+    if len(armada) == 0:
+        return
+    frekuensi = frekuensi_armada(armada)
+    armada_kpi(armada, frekuensi)
+    biaya_perawatan(armada).head(8)
+    rata_volume_armada(data, sel, 'M', frekuensi['Armada'], 'Bulan').head(10)
+
+
+def tab_sopir(sel, data):
+    sopir = sopir_valid(sel.cube)
+    if len(sopir) == 0:
+        return
+    sopir_kpi(tugas_sopir(sopir))
+    pemasukan_sopir(sopir).head(8)
+
+
+TABS = {
+    'ringkasan_keuangan': tab_ringkasan,
+    'pengiriman_air': tab_pengiriman,
+    'peta_demografi': tab_peta,
+    'analisis_armada': tab_armada,
+    'kinerja_sopir': tab_sopir,
+}
+
+
+def run_size(rows, fmt, workdir, seed=0, drivers=8, trucks=6, locations=8, years=1, repeat=5):
+    """Membuat data sintetis sebesar `rows` lalu mengukur setiap tahap pipeline."""
+    result = {'rows': rows, 'format': fmt, 'stages': {}}
+    stages = result['stages']
+
+    def record(name, seconds, peak_mb, **extra):
+        stages[name] = {'seconds': round(seconds, 6), 'peak_rss_mb': round(peak_mb, 1), **extra}
+
+    rng = np.random.default_rng(seed)
+    df_lokasi_raw = generate_lokasi(locations, rng)
+    df_raw = generate_keuangan(rows, drivers, trucks, locations, years, seed=seed)
+    path = os.path.join(workdir, f'sintetis_{rows}' + ('.xlsx' if fmt == 'xlsx' else ''))
+    _, seconds, peak = measure(write_dataset, path, df_raw, df_lokasi_raw, fmt)
+    record('generate_write', seconds, peak)
+    del df_raw
+
+    reader = read_workbook if fmt == 'xlsx' else read_parquet_dataset
+    (df_keuangan, df_lokasi), seconds, peak = measure(reader, path)
+    record('load', seconds, peak)
+
+    (df_keuangan, missing_report, _), seconds, peak = measure(clean_keuangan, df_keuangan)
+    record('clean', seconds, peak, missing_values=int(sum(missing_report.values())))
+    _, seconds, peak = measure(profile, df_keuangan)
+    record('profile', seconds, peak)
+
+    snapshot_dir = os.path.join(workdir, 'snapshots')
+    fingerprint = {'path': path, 'rows': rows, 'benchmark': True}
+    _, seconds, peak = measure(save_snapshot, fingerprint, df_keuangan, df_lokasi, missing_report, snapshot_dir)
+    record('snapshot_write', seconds, peak)
+    _, seconds, peak = measure(load_snapshot, fingerprint, snapshot_dir)
+    record('snapshot_read', seconds, peak)
+
+    def build_model():
+        dim_lokasi = build_location_dim(df_lokasi)
+        return build_cube(df_keuangan), dim_lokasi, order_location_ids(df_keuangan['Order'], dim_lokasi)
+
+    (df_cube, dim_lokasi, order_lokasi), seconds, peak = measure(build_model)
+    record('build_cube', seconds, peak, cube_rows=len(df_cube))
+    # Bagian Dataset yang dibaca analytics.py; 'deret' diisi setelah tahap build_series
+    data = SimpleNamespace(df_keuangan=df_keuangan, df_cube=df_cube, df_lokasi=dim_lokasi, order_lokasi=order_lokasi,
+                           versi_data=f'benchmark-{rows}')
+
+    combos = filter_combinations(df_cube)
+    slices, seconds, peak = measure(
+        lambda: [select(data, f['Bulan'], f['Sopir'], f['Plat Nomor']) for f in combos], repeat=repeat)
+    record('filter', seconds / len(combos), peak, combinations=len(combos))
+
+    # Filter satu minggu: pencarian biner pada baris terurut lalu kubus untuk potongan tersebut
+    tanggal = df_keuangan['Tanggal']
+    minggu = week_bounds(date_bounds(tanggal)[1])
+    baris, seconds, peak = measure(date_range_rows, tanggal, *minggu, repeat=repeat)
+    record('filter_tanggal', seconds, peak)
+    _, seconds, peak = measure(lambda: build_cube(df_keuangan.iloc[baris]), repeat=repeat)
+    record('range_cube', seconds, peak, rows=baris.stop - baris.start)
+
+    # Deret harian / mingguan / bulanan: dibangun sekali, lalu grafik mingguan untuk satu kuartal
+    deret, seconds, peak = measure(build_series, df_keuangan)
+    record('build_series', seconds, peak, daily_rows=len(deret['D']))
+    data.deret = deret
+    akhir = date_day(minggu[1])
+    _, seconds, peak = measure(series, deret, 'W', {}, (akhir - 90, akhir), repeat=repeat)
+    record('series_mingguan', seconds, peak)
+
+    # Titik peta (atau sel grid) untuk seluruh pengiriman tanpa filter
+    _, pengiriman = lokasi_pengiriman(df_cube, dim_lokasi, order_lokasi)
+    (df_map, _), seconds, peak = measure(lambda: level_of_detail(map_points(pengiriman)), repeat=repeat)
+    record('map_points', seconds, peak, points=len(df_map))
+
+    # Indeks spasial lokasi: dibangun sekali, lalu 5 lokasi terdekat untuk setiap lokasi
+    indeks, seconds, peak = measure(build_location_index, dim_lokasi)
+    record('geo_index', seconds, peak, locations=len(indeks))
+    _, seconds, peak = measure(indeks.nearest, dim_lokasi['Latitude'], dim_lokasi['Longitude'], 5, repeat=repeat)
+    record('geo_nearest', seconds, peak)
+
+    for name, func in TABS.items():
+        _, seconds, peak = measure(lambda: [func(s, data) for s in slices], repeat=repeat)
+        record(f'tab_{name}', seconds / len(slices), peak)
+
+    # Ekspor semua transaksi per potongan baris (Excel dilewati: terlalu lambat untuk data besar)
+    export_dir = os.path.join(workdir, 'exports')
+    for fmt in FORMATS:
+        if fmt != 'xlsx':
+            _, seconds, peak = measure(export_file, data, slices[0], 'transaksi', fmt, 'M', export_dir)
+            record(f'export_{fmt}', seconds, peak)
+
+    result['memory_mb'] = {
+        'df_keuangan': round(df_keuangan.memory_usage(deep=True).sum() / 2**20, 3),
+        'df_cube': round(df_cube.memory_usage(deep=True).sum() / 2**20, 3),
+    }
+    result['transactions'] = int(totals(df_cube)[COUNT])
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark pipeline dasbor dengan data sintetis.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--format', choices=['parquet', 'xlsx'], default='parquet')
+    parser.add_argument('--drivers', type=int, default=8)
+    parser.add_argument('--trucks', type=int, default=6)
+    parser.add_argument('--locations', type=int, default=8)
+    parser.add_argument('--years', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5, help='Pengulangan untuk tahap filter dan agregasi')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workdir', help='Direktori data sintetis (default: direktori sementara)')
+    parser.add_argument('--output', help='File JSON hasil (default: stdout)')
+    args = parser.parse_args(argv)
+
+    report = {
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+        },
+        'parameters': {k: v for k, v in vars(args).items() if k not in ('output', 'workdir')},
+        'results': [],
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        for rows in args.sizes:
+            if args.format == 'xlsx' and rows > XLSX_MAX_ROWS:
+                report['results'].append({'rows': rows, 'format': args.format, 'skipped': 'melebihi batas baris Excel'})
+                continue
+            print(f'Benchmark {rows:,} baris...', file=sys.stderr)
+            report['results'].append(run_size(rows, args.format, workdir, args.seed, args.drivers, args.trucks,
+                                              args.locations, args.years, args.repeat))
+
+    # ru_maxrss dalam KB di Linux
+    report['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
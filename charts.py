@@ -0,0 +1,43 @@
+"""Grafik Plotly yang dipakai bersama oleh dashboard.py dan laporan reports.py."""
+from functools import lru_cache
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from timeseries import LABA
+
+MARGIN = dict(l=0, r=0, t=30, b=0)
+
+
+def combo_figure(df, satuan, title=None):
+    """Pemasukan & Pengeluaran (bar) dan Laba Bersih (garis) per periode dari tabel deret."""
+    periode = df[df.columns[0]]
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=periode, y=df['Pemasukan'], name='Pemasukan', marker_color='#2ca02c'))
+    fig.add_trace(go.Bar(x=periode, y=df['Pengeluaran'], name='Pengeluaran', marker_color='#d62728'))
+    fig.add_trace(go.Scatter(x=periode, y=df[LABA], name='Laba Bersih', mode='lines+markers', line=dict(color='#1f77b4', width=3)))
+    fig.update_layout(
+        barmode='group',
+        title=title or f'Pengeluaran, Pemasukan, dan Laba Bersih per {satuan}',
+        height=350,
+        margin=MARGIN,
+        xaxis_title=satuan,
+        yaxis_title='Nilai (Rp)'
+    )
+    return fig
+
+
+@lru_cache(maxsize=64)
+def _hbar_spec(x, y, height):
+    # px.bar jauh lebih lambat daripada go.Figure: figur px dibuat sekali per pasangan kolom
+    fig = px.bar(pd.DataFrame({x: [0], y: ['']}), x=x, y=y, orientation='h', height=height)
+    fig.update_layout(margin=MARGIN)
+    return fig.to_plotly_json()
+
+
+def hbar_figure(df, x, y, title, height=300):
+    """Bar horizontal untuk tabel peringkat (top lokasi, armada, sopir); sama dengan px.bar."""
+    spec = _hbar_spec(x, y, height)
+    trace = dict(spec['data'][0], x=df[x].to_numpy(), y=df[y].to_numpy())
+    return go.Figure({'data': [trace], 'layout': dict(spec['layout'], title={'text': title})})
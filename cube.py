@@ -0,0 +1,93 @@
+import numpy as np
+
+from locations import attach_coordinates
+from pipeline import concat_compact
+
+# Dimensi dan ukuran kubus agregat yang dibangun sekali saat data dimuat
+DIMENSIONS = ['Bulan', 'Sopir', 'Plat Nomor', 'Order', 'Jenis Transaksi']
+SUM_MEASURES = ['Pemasukan', 'Pengeluaran', 'Volume (L)', 'Jumlah']
+COUNT = 'Jumlah Transaksi'
+MAX_VOLUME = 'Volume Maks'
+# Posisi baris pertama tiap sel, agar urutan seri sama dengan Series.value_counts()
+FIRST_ROW = 'Baris Pertama'
+
+# Cara menggabungkan ulang tiap ukuran ketika kubus di-rollup
+ROLLUP = {**{m: 'sum' for m in SUM_MEASURES}, COUNT: 'sum', MAX_VOLUME: 'max', FIRST_ROW: 'min'}
+
+DELIVERY_PATTERN = 'Air|air|Pengiriman|pengiriman'
+
+
+def build_cube(df):
+    """Agregat aditif per kombinasi Bulan, Sopir, Plat Nomor, Order dan Jenis Transaksi."""
+    data = df[DIMENSIONS + SUM_MEASURES].assign(**{FIRST_ROW: np.arange(len(df))})
+    aggregations = {m: (m, 'sum') for m in SUM_MEASURES}
+    aggregations[COUNT] = ('Pemasukan', 'size')
+    aggregations[MAX_VOLUME] = ('Volume (L)', 'max')
+    aggregations[FIRST_ROW] = (FIRST_ROW, 'min')
+    return data.groupby(DIMENSIONS, dropna=False, observed=True).agg(**aggregations).reset_index()
+
+
+def merge_cubes(cube, new_cube, offset):
+    """Kubus gabungan tanpa membaca ulang baris lama; baris `new_cube` dimulai di posisi `offset`.
+
+    Hasilnya sama dengan build_cube pada gabungan kedua data transaksi.
+    """
+    new_cube = new_cube.assign(**{FIRST_ROW: new_cube[FIRST_ROW] + offset})
+    combined = concat_compact([cube, new_cube])
+    return combined.groupby(DIMENSIONS, dropna=False, observed=True).agg(ROLLUP).reset_index()
+
+
+def slice_cube(cube, filters):
+    """Potongan kubus untuk filter {dimensi: nilai}; nilai None berarti semua."""
+    mask = np.ones(len(cube), dtype=bool)
+    for dim, value in filters.items():
+        if value is not None:
+            mask &= (cube[dim] == value).to_numpy(dtype=bool, na_value=False)
+    return cube[mask]
+
+
+def rollup(cube, by):
+    """Agregasi ulang potongan kubus ke dimensi `by` (kunci kosong dibuang seperti groupby biasa)."""
+    return cube.groupby(by, observed=True).agg(ROLLUP)
+
+
+def totals(cube):
+    """Total seluruh ukuran pada potongan kubus."""
+    result = {m: cube[m].sum() for m in SUM_MEASURES}
+    result[COUNT] = int(cube[COUNT].sum())
+    result[MAX_VOLUME] = cube[MAX_VOLUME].max()
+    return result
+
+
+def value_counts(cube, dim):
+    """Setara df[dim].value_counts() pada baris mentah yang diwakili potongan kubus."""
+    counts = rollup(cube, dim).sort_values(FIRST_ROW)[COUNT]
+    counts = counts.sort_values(ascending=False, kind='stable')
+    counts.name = 'count'
+    return counts
+
+
+def located_orders(cube, df_lokasi, order_lokasi):
+    """Agregat per Order dan Jenis Transaksi beserta koordinatnya (NaN jika lokasi tidak dikenal).
+
+    Koordinat ditempelkan pada agregat per Order, bukan pada setiap baris transaksi.
+    """
+    per_order = rollup(cube, ['Order', 'Jenis Transaksi']).reset_index()
+    return attach_coordinates(per_order, df_lokasi, order_lokasi)
+
+
+def is_delivery(jenis_transaksi):
+    return jenis_transaksi.str.contains(DELIVERY_PATTERN, na=False)
+
+
+def deliveries(located):
+    """Agregat pengiriman per lokasi yang memiliki koordinat.
+
+    Memakai transaksi yang jenisnya mengandung 'Air' / 'Pengiriman'; jika tidak ada,
+    semua transaksi dengan koordinat valid dipakai.
+    """
+    with_coords = located.dropna(subset=['Latitude', 'Longitude'])
+    pengiriman = with_coords[is_delivery(with_coords['Jenis Transaksi'])]
+    if len(pengiriman) == 0:
+        pengiriman = with_coords
+    return pengiriman
@@ -1,88 +1,86 @@
+from functools import partial
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-import altair as alt
 import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+
+from analytics import (armada_kpi, armada_valid, biaya_perawatan, frekuensi_armada, lokasi_pengiriman, pemasukan_sopir,
+                       pengiriman_kpi, rata_volume_armada, ringkasan_kpi, select, sopir_kpi, sopir_valid, top_lokasi_order,
+                       top_lokasi_volume, tren, tugas_sopir)
+from charts import combo_figure, hbar_figure
+from cube import COUNT, build_cube, is_delivery, rollup, value_counts
+from dataset_store import DatasetStore
+from export import FORMATS, ISI, MIME, export_bytes, export_extension, export_name
+from figure_cache import FigureCache
+from instrumentation import METRICS_FILE, count, env_enabled, finish_rerun, note_cache_miss, span, start_rerun
+from geoindex import build_location_index
+from locations import CARA, LOKASI_ID, SKOR, attach_coordinates
+from mapbins import DEFAULT_ZOOM, JUMLAH_LOKASI, level_of_detail, map_points
+from pipeline import CATEGORICAL_COLS, DATA_SOURCE, REPORT_COLS, SHEET_KEUANGAN, SHEET_LOKASI, XLSX_MAX_ROWS, bulan_labels
+from quality import is_clean, missing_counts
+from timeindex import date_bounds, week_bounds
+from timeseries import GRANULARITAS, LABA, SATUAN
 
 # Set layout ke wide mode dan judul halaman
 st.set_page_config(layout="wide", page_title="Dashboard Keuangan Truk Air", initial_sidebar_state="collapsed")
 
 # --- MEMUAT DATA DARI SATU FILE EXCEL ---
-@st.cache_data
+@st.cache_resource
+def get_dataset_store():
+    # Satu dataset bersama untuk semua sesi; thread background memuat ulang jika file Excel berubah
+    return DatasetStore(DATA_SOURCE).start()
+
 def load_data():
-    # Nama file Excel Anda
-    file_path = 'Dataset Keuangan Truk Air Isi Ulang 2024.xlsx'
+    # File Excel Anda, atau direktori / pola glob berisi beberapa workbook (DASHBOARD_DATA)
+    file_path = DATA_SOURCE
     
     try:
-        # Membaca data dari sheet yang berbeda dalam satu file Excel
-        df_keuangan = pd.read_excel(file_path, sheet_name='Dataset Keuangan Truk Air Isi U')
-        df_lokasi = pd.read_excel(file_path, sheet_name='lokasi')
+        # Tidak menyalin data: semua sesi membaca objek Dataset yang sama
+        return get_dataset_store().get()
         
     except FileNotFoundError:
         st.error(f"File '{file_path}' tidak ditemukan. Pastikan file Excel tersebut berada di direktori yang sama dengan skrip Python Anda.")
-        return None, None
+        return None
     except Exception as e:
         st.error(f"Gagal membaca sheet dari file Excel. Error: {e}")
-        st.info("Pastikan nama sheet di file Excel Anda sudah benar: 'Dataset Keuangan Truk Air Isi U' dan 'lokasi'.")
-        return None, None
-
-    # --- PEMBERSIHAN DATA ---
-    # Menghitung jumlah missing values sebelum pembersihan
-    missing_report = {}
-    for col in ['Pemasukan', 'Pengeluaran', 'Volume (L)', 'Jumlah', 'Jenis Transaksi', 'Plat Nomor', 'Sopir', 'Order']:
-        if col in df_keuangan.columns:
-            missing_report[col] = df_keuangan[col].isna().sum() + (df_keuangan[col].astype(str).str.lower().isin(['tidak diketahui', '', 'unknown'])).sum()
-    total_missing = sum(missing_report.values())
-
-    # Mengubah 'Tanggal' menjadi datetime
-    df_keuangan['Tanggal'] = pd.to_datetime(df_keuangan['Tanggal'], errors='coerce')
-
-    # Mengisi missing values numerik
-    numeric_cols = ['Pemasukan', 'Pengeluaran', 'Volume (L)', 'Jumlah']
-    for col in numeric_cols:
-        if col in df_keuangan.columns:
-            df_keuangan[col] = pd.to_numeric(df_keuangan[col], errors='coerce').fillna(0)
-
-    # Mengisi missing values kategorikal dengan kombinasi mirip atau modus
-    categorical_cols = ['Jenis Transaksi', 'Plat Nomor', 'Sopir', 'Order']
-    for col in categorical_cols:
-        if col in df_keuangan.columns:
-            mask_na = df_keuangan[col].isna() | (df_keuangan[col] == 'Tidak Diketahui') | (df_keuangan[col] == '') | (df_keuangan[col].str.lower() == 'unknown')
-            for idx in df_keuangan[mask_na].index:
-                # Coba cari baris lain yang mirip (selain kolom yang kosong)
-                row = df_keuangan.loc[idx]
-                subset = df_keuangan.copy()
-                for c in categorical_cols:
-                    if c != col and pd.notna(row[c]) and row[c] not in ['Tidak Diketahui', '', 'unknown', 'Unknown']:
-                        subset = subset[subset[c] == row[c]]
-                # Ambil nilai paling sering dari subset mirip
-                val = None
-                if len(subset) > 0 and subset[col].notna().any():
-                    val = subset[col][subset[col].notna() & (subset[col] != 'Tidak Diketahui') & (subset[col] != '') & (subset[col].str.lower() != 'unknown')].mode()
-                    if not val.empty:
-                        df_keuangan.at[idx, col] = val.iloc[0]
-                        continue
-                # Jika tidak ada, pakai modus seluruh kolom
-                mode_val = df_keuangan[col][df_keuangan[col].notna() & (df_keuangan[col] != 'Tidak Diketahui') & (df_keuangan[col] != '') & (df_keuangan[col].str.lower() != 'unknown')].mode()
-                if not mode_val.empty:
-                    df_keuangan.at[idx, col] = mode_val.iloc[0]
-                else:
-                    df_keuangan.at[idx, col] = 'Tidak Diketahui'
+        st.info(f"Pastikan nama sheet di file Excel Anda sudah benar: '{SHEET_KEUANGAN}' dan '{SHEET_LOKASI}'.")
+        return None
 
-    # Menambahkan kolom 'Bulan' untuk analisis bulanan
-    df_keuangan['Bulan'] = df_keuangan['Tanggal'].dt.to_period('M').astype(str)
-    
-    # Menggabungkan dengan data lokasi
-    df_merged = pd.merge(df_keuangan, df_lokasi, left_on='Order', right_on='Nama Lokasi', how='left')
-    
-    return df_keuangan, df_merged, missing_report, total_missing
+@st.cache_data(max_entries=64)
+def load_range_cube(versi_data, start, stop, _df_keuangan):
+    # Kubus untuk potongan baris satu rentang tanggal; biayanya sebanding dengan panjang rentang
+    note_cache_miss()
+    return build_cube(_df_keuangan.iloc[start:stop])
+
+@st.cache_data(max_entries=128)
+def load_deliveries(versi_data, filter_key, _cube_filtered, _df_lokasi, _order_lokasi):
+    # Agregat per lokasi beserta koordinat, dihitung sekali per versi data dan kombinasi filter
+    # lalu dipakai bersama oleh halaman Pengiriman Air dan Peta & Demografi
+    note_cache_miss()
+    return lokasi_pengiriman(_cube_filtered, _df_lokasi, _order_lokasi)
+
+@st.cache_data(max_entries=128)
+def load_map_points(versi_data, filter_key, zoom, _df_pengiriman):
+    # Titik peta per lokasi, atau sel grid jika lokasinya terlalu banyak, per versi data, filter dan zoom
+    note_cache_miss()
+    return level_of_detail(map_points(_df_pengiriman), zoom)
 
-df_keuangan, df_merged, missing_report, total_missing = load_data()
+@st.cache_resource
+def get_figure_cache():
+    # Satu cache grafik untuk semua sesi; entri terlama dibuang jika penuh
+    return FigureCache(maxsize=256)
+
+# Instrumentasi performa opsional: DASHBOARD_METRICS=1 atau buka dengan ?diagnostik=1
+diagnostik = env_enabled() or st.query_params.get('diagnostik') == '1'
+start_rerun(diagnostik)
+
+with span('load_data', cached=True) as load_span:
+    dataset = load_data()
+    load_span.set(rows=len(dataset.df_keuangan) if dataset is not None else 0)
 
 # --- BAGIAN UI DASBOR ---
-if df_keuangan is not None:
+if dataset is not None:
     # Custom CSS untuk styling
     st.markdown("""
     <style>
@@ -119,38 +117,67 @@ if df_keuangan is not None:
     st.title("📊 Dashboard Keuangan dan Operasional Truk Air Isi Ulang 2024")
     st.markdown("Dashboard interaktif untuk analisis data keuangan, pengiriman air, dan kinerja operasional")
 
-    # Indikator kebersihan data
-    def is_data_clean(df, categorical_cols):
-        for col in categorical_cols:
-            if col in df.columns:
-                if df[col].isna().any() or (df[col].astype(str).str.lower().isin(['tidak diketahui', '', 'unknown'])).any():
-                    return False
-        return True
+    # Workbook yang gagal dibaca dilewati; sisanya tetap ditampilkan
+    file_gagal = [s['file'] for s in dataset.sumber if s['error']]
+    if file_gagal:
+        st.warning(f"⚠️ {len(file_gagal)} file tidak bisa dibaca dan dilewati: {', '.join(file_gagal)}")
 
-    data_bersih = is_data_clean(df_keuangan, ['Jenis Transaksi', 'Plat Nomor', 'Sopir', 'Order'])
+    def profil_tampil(profil):
+        # Min / Maks berisi angka dan tanggal sekaligus: ditampilkan sebagai teks
+        return profil.fillna({'Min': '', 'Maks': ''}).astype({'Min': str, 'Maks': str})
+
+    # Indikator kebersihan data dari profil kualitas yang dihitung sekali per versi data
+    data_bersih = is_clean(dataset.profil_bersih, CATEGORICAL_COLS)
     if data_bersih:
         st.success('✅ Data sudah bersih dari missing values dan label unknown.')
     else:
         st.warning('⚠️ Data masih mengandung missing values atau label unknown.')
 
     # Sidebar untuk filter
+    filter_span = span('filter').start()
     with st.sidebar:
         st.header("🔧 Filter Data")
         
-        # Filter bulan (pakai radio jika opsinya sedikit)
-        bulan_options = ['Semua'] + sorted([b for b in df_keuangan['Bulan'].unique().tolist() if pd.notna(b)])
-        if len(bulan_options) <= 7:
-            selected_bulan = st.radio("Pilih Bulan:", bulan_options, horizontal=True)
+        # Filter waktu: per bulan, rentang tanggal bebas, atau satu minggu
+        tanggal_awal, tanggal_akhir = date_bounds(dataset.df_keuangan['Tanggal'])
+        mode_waktu = 'Bulan'
+        if tanggal_awal is not None:
+            mode_waktu = st.radio("Filter Waktu:", ['Bulan', 'Rentang Tanggal', 'Minggu'], horizontal=True)
+        selected_bulan = 'Semua'
+        rentang = None
+
+        if mode_waktu == 'Bulan':
+            # Filter bulan (pakai radio jika opsinya sedikit)
+            bulan_codes = sorted(dataset.df_cube['Bulan'].dropna().unique().tolist())
+            bulan_lookup = dict(zip(bulan_labels(bulan_codes), bulan_codes))
+            bulan_options = ['Semua'] + list(bulan_lookup)
+            if len(bulan_options) <= 7:
+                selected_bulan = st.radio("Pilih Bulan:", bulan_options, horizontal=True)
+            else:
+                selected_bulan = st.select_slider("Pilih Bulan:", options=bulan_options)
+        elif mode_waktu == 'Rentang Tanggal':
+            pilihan = st.date_input("Pilih Rentang Tanggal:", value=(tanggal_awal, tanggal_akhir),
+                                    min_value=tanggal_awal, max_value=tanggal_akhir)
+            # Selama baru satu tanggal dipilih, rentangnya hanya tanggal itu
+            rentang = (pilihan[0], pilihan[-1]) if pilihan else (tanggal_awal, tanggal_akhir)
         else:
-            selected_bulan = st.select_slider("Pilih Bulan:", options=bulan_options)
+            hari = st.date_input("Pilih Minggu (tanggal mana saja di minggu itu):", value=tanggal_akhir,
+                                 min_value=tanggal_awal, max_value=tanggal_akhir)
+            rentang = week_bounds(hari)
+            st.caption(f"Senin {rentang[0]:%d %b %Y} s.d. Minggu {rentang[1]:%d %b %Y}")
+
+        # Granularitas grafik deret waktu (Ringkasan, Volume Air, Rata-rata Volume Armada)
+        granularitas = st.radio("Granularitas Grafik:", list(GRANULARITAS), index=len(GRANULARITAS) - 1, horizontal=True)
+        freq = GRANULARITAS[granularitas]
+        satuan = SATUAN[freq]
 
         # Filter sopir (pakai radio jika <=7, jika lebih banyak tampilkan top 5 saja)
-        sopir_list = df_keuangan[df_keuangan['Sopir'] != 'Tidak Diketahui']['Sopir'].value_counts().index.tolist()
+        sopir_list = value_counts(dataset.df_cube[dataset.df_cube['Sopir'] != 'Tidak Diketahui'], 'Sopir').index.tolist()
         sopir_options = ['Semua'] + sopir_list[:5]
         selected_sopir = st.radio("Pilih Sopir:", sopir_options, horizontal=True)
 
         # Filter armada (pakai radio jika <=7, jika lebih banyak tampilkan top 5 saja)
-        armada_list = df_keuangan[df_keuangan['Plat Nomor'] != 'Tidak Diketahui']['Plat Nomor'].value_counts().index.tolist()
+        armada_list = value_counts(dataset.df_cube[dataset.df_cube['Plat Nomor'] != 'Tidak Diketahui'], 'Plat Nomor').index.tolist()
         armada_options = ['Semua'] + armada_list[:5]
         selected_armada = st.radio("Pilih Armada:", armada_options, horizontal=True)
 
@@ -158,99 +185,112 @@ if df_keuangan is not None:
         st.markdown('---')
         st.subheader('ℹ️ Info Missing Values Dataset')
         with st.expander('Sebelum Pembersihan'):
-            st.write(f"Total missing values (termasuk 'Tidak Diketahui', 'unknown', ''): **{total_missing}**")
-            st.write(missing_report)
+            st.write(f"Total missing values (termasuk 'Tidak Diketahui', 'unknown', ''): **{dataset.total_missing}**")
+            st.write(dataset.missing_report)
+            # Profil kualitas data mentah (tersimpan bersama snapshot; tidak dihitung ulang per rerun)
+            if dataset.profil_awal is not None:
+                st.dataframe(profil_tampil(dataset.profil_awal))
         with st.expander('Setelah Pembersihan'):
-            # Hitung ulang cleaned_missing_report di sini agar tetap up-to-date
-            cleaned_missing_report = {}
-            for col in ['Pemasukan', 'Pengeluaran', 'Volume (L)', 'Jumlah', 'Jenis Transaksi', 'Plat Nomor', 'Sopir', 'Order']:
-                if col in df_keuangan.columns:
-                    cleaned_missing_report[col] = df_keuangan[col].isna().sum() + (df_keuangan[col].astype(str).str.lower().isin(['tidak diketahui', '', 'unknown'])).sum()
+            cleaned_missing_report = missing_counts(dataset.profil_bersih, REPORT_COLS)
             cleaned_total_missing = sum(cleaned_missing_report.values())
             st.write(f"Total missing values setelah pembersihan: **{cleaned_total_missing}**")
             st.write(cleaned_missing_report)
+            st.dataframe(profil_tampil(dataset.profil_bersih))
+        with st.expander('Penggunaan Memori'):
+            st.dataframe(dataset.memori, hide_index=True)
+            st.write(f"Total memori data: **{dataset.memori['Memori (MB)'].sum():,.3f} MB**")
 
-    # Apply filters
-    df_filtered = df_keuangan.copy()
-    df_merged_filtered = df_merged.copy()
-    
-    if selected_bulan != 'Semua':
-        df_filtered = df_filtered[df_filtered['Bulan'] == selected_bulan]
-        df_merged_filtered = df_merged_filtered[df_merged_filtered['Bulan'] == selected_bulan]
-    
-    if selected_sopir != 'Semua':
-        df_filtered = df_filtered[df_filtered['Sopir'] == selected_sopir]
-        df_merged_filtered = df_merged_filtered[df_merged_filtered['Sopir'] == selected_sopir]
-    
-    if selected_armada != 'Semua':
-        df_filtered = df_filtered[df_filtered['Plat Nomor'] == selected_armada]
-        df_merged_filtered = df_merged_filtered[df_merged_filtered['Plat Nomor'] == selected_armada]
-
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "📈 Ringkasan Keuangan",
-        "💧 Pengiriman Air",
-        "🌍 Peta & Demografi",
-        "🚚 Analisis Armada",
-        "👤 Kinerja Sopir"
-    ])
+    # Apply filters pada kubus agregat (bukan pada baris transaksi mentah); kubus rentang tanggal di-cache
+    pilihan = select(
+        dataset,
+        bulan=None if selected_bulan == 'Semua' else bulan_lookup[selected_bulan],
+        sopir=None if selected_sopir == 'Semua' else selected_sopir,
+        armada=None if selected_armada == 'Semua' else selected_armada,
+        rentang=rentang,
+        range_cube=lambda start, stop: load_range_cube(dataset.versi_data, start, stop, dataset.df_keuangan),
+    )
+    filters, filter_key, baris, _, cube_filtered, kpi = pilihan
+    filter_span.stop(rows=kpi[COUNT])
+
+    # Ekspor transaksi terfilter atau tabel agregat semua halaman. File baru dibuat saat tombol unduh
+    # diklik (di thread terpisah) dan disimpan per versi data dan filter, sehingga unduhan ulang langsung tersedia
+    with st.sidebar:
+        with st.expander('⬇️ Ekspor Data'):
+            isi_ekspor = st.radio("Isi:", ISI, format_func=str.title, horizontal=True, key='ekspor_isi')
+            format_ekspor = st.radio("Format:", FORMATS, format_func=str.upper, horizontal=True, key='ekspor_format')
+            terlalu_besar = isi_ekspor == 'transaksi' and format_ekspor == 'xlsx' and kpi[COUNT] > XLSX_MAX_ROWS
+            if terlalu_besar:
+                st.caption(f"Excel hanya menampung {XLSX_MAX_ROWS:,} baris; pilih CSV atau Parquet.")
+            st.download_button(
+                f"Unduh {kpi[COUNT]:,} transaksi" if isi_ekspor == 'transaksi' else "Unduh tabel agregat",
+                data=partial(export_bytes, dataset, pilihan, isi_ekspor, format_ekspor, freq),
+                file_name=export_name(pilihan, isi_ekspor, format_ekspor, rentang),
+                mime=MIME[export_extension(isi_ekspor, format_ekspor)],
+                on_click='ignore',
+                disabled=terlalu_besar,
+            )
+
+    # Grafik disimpan per versi data, kombinasi filter dan nama grafik, dipakai bersama antar sesi
+    figure_cache = get_figure_cache()
+
+    def cached_figure(name, build):
+        built = []
+        fig = figure_cache.get_or_build((dataset.versi_data, filter_key, name), lambda: built.append(True) or build())
+        count('figure_miss' if built else 'figure_hit')
+        return fig
+
+    # Navigasi halaman: hanya halaman yang dipilih yang dihitung dan digambar
+    TAB_RINGKASAN = "📈 Ringkasan Keuangan"
+    TAB_PENGIRIMAN = "💧 Pengiriman Air"
+    TAB_PETA = "🌍 Peta & Demografi"
+    TAB_ARMADA = "🚚 Analisis Armada"
+    TAB_SOPIR = "👤 Kinerja Sopir"
+    halaman = st.radio(
+        "Pilih Halaman:",
+        [TAB_RINGKASAN, TAB_PENGIRIMAN, TAB_PETA, TAB_ARMADA, TAB_SOPIR],
+        horizontal=True,
+        label_visibility="collapsed"
+    )
+    page_span = span(f'halaman: {halaman}').start()
 
     # --- TAB 1: RINGKASAN KEUANGAN ---
-    with tab1:
+    if halaman == TAB_RINGKASAN:
         st.header("💰 Ringkasan Keuangan")
         
         # KPI Cards menggunakan data yang difilter
         col1, col2, col3, col4 = st.columns(4)
-        total_pemasukan = df_filtered['Pemasukan'].sum()
-        total_pengeluaran = df_filtered['Pengeluaran'].sum()
-        laba_bersih = total_pemasukan - total_pengeluaran
-        total_transaksi = len(df_filtered)
+        kpi_ringkasan = ringkasan_kpi(kpi)
         
-        col1.metric("Total Pemasukan", f"Rp {total_pemasukan:,.0f}")
-        col2.metric("Total Pengeluaran", f"Rp {total_pengeluaran:,.0f}")
-        col3.metric("Laba Bersih", f"Rp {laba_bersih:,.0f}")
-        col4.metric("Total Transaksi", f"{total_transaksi:,}")
+        col1.metric("Total Pemasukan", f"Rp {kpi_ringkasan['Total Pemasukan']:,.0f}")
+        col2.metric("Total Pengeluaran", f"Rp {kpi_ringkasan['Total Pengeluaran']:,.0f}")
+        col3.metric("Laba Bersih", f"Rp {kpi_ringkasan[LABA]:,.0f}")
+        col4.metric("Total Transaksi", f"{kpi_ringkasan['Total Transaksi']:,}")
 
         # Charts dalam layout yang kompak
         col1, _ = st.columns([2.5, 1])
         
         with col1:
             # Grafik kombinasi: Pemasukan & Pengeluaran (bar), Laba Bersih (garis) - lebih detail dan lebih panjang
-            df_bulanan = df_filtered.groupby(df_filtered['Tanggal'].dt.strftime('%b %Y')).agg({
-                'Pemasukan': 'sum',
-                'Pengeluaran': 'sum'
-            }).reset_index()
-            # Urutkan bulan secara kronologis
-            df_bulanan['BulanSort'] = pd.to_datetime(df_bulanan[df_bulanan.columns[0]], format='%b %Y')
-            df_bulanan = df_bulanan.sort_values('BulanSort')
-            df_bulanan['Laba Bersih'] = df_bulanan['Pemasukan'] - df_bulanan['Pengeluaran']
-
-            fig_combo = go.Figure()
-            fig_combo.add_trace(go.Bar(x=df_bulanan[df_bulanan.columns[0]], y=df_bulanan['Pemasukan'], name='Pemasukan', marker_color='#2ca02c'))
-            fig_combo.add_trace(go.Bar(x=df_bulanan[df_bulanan.columns[0]], y=df_bulanan['Pengeluaran'], name='Pengeluaran', marker_color='#d62728'))
-            fig_combo.add_trace(go.Scatter(x=df_bulanan[df_bulanan.columns[0]], y=df_bulanan['Laba Bersih'], name='Laba Bersih', mode='lines+markers', line=dict(color='#1f77b4', width=3)))
-            fig_combo.update_layout(
-                barmode='group',
-                title='Pengeluaran, Pemasukan, dan Laba Bersih per Bulan',
-                height=350,
-                margin=dict(l=0, r=0, t=30, b=0),
-                xaxis_title='Bulan',
-                yaxis_title='Nilai (Rp)'
-            )
+            # Deret per hari / minggu / bulan sudah berurutan kronologis dari tabel deret
+            def build_fig_combo():
+                df_bulanan = tren(dataset, pilihan, freq)
+
+                fig_combo = combo_figure(df_bulanan, satuan)
+                return fig_combo
+            fig_combo = cached_figure(f'ringkasan_{granularitas.lower()}', build_fig_combo)
             st.plotly_chart(fig_combo, use_container_width=True)
 
     # --- TAB 2: PENGIRIMAN AIR ---
-    with tab2:
+    elif halaman == TAB_PENGIRIMAN:
         st.header("💧 Analisis Pengiriman Air")
 
         # KPI untuk volume air
         col1, col2, col3 = st.columns(3)
-        total_volume = df_filtered['Volume (L)'].sum()
-        avg_volume = df_filtered['Volume (L)'].mean()
-        max_volume = df_filtered['Volume (L)'].max()
+        kpi_pengiriman = pengiriman_kpi(kpi)
         
-        col1.metric("Total Volume Terkirim", f"{total_volume:,.0f} L")
-        col2.metric("Rata-rata Volume", f"{avg_volume:,.1f} L")
-        col3.metric("Volume Terbesar", f"{max_volume:,.0f} L")
+        col1.metric("Total Volume Terkirim", f"{kpi_pengiriman['Total Volume Terkirim']:,.0f} L")
+        col2.metric("Rata-rata Volume", f"{kpi_pengiriman['Rata-rata Volume']:,.1f} L")
+        col3.metric("Volume Terbesar", f"{kpi_pengiriman['Volume Terbesar']:,.0f} L")
 
         # Pilihan tampilan: Analisis atau Peta
         view_option = st.radio(
@@ -264,26 +304,23 @@ if df_keuangan is not None:
             col1, _ = st.columns([3, 1])
             
             with col1:
-                # Volume per bulan (Line Chart, Bulan Lebih Detail)
-                volume_per_bulan = df_filtered.groupby(df_filtered['Tanggal'].dt.strftime('%b %Y'))['Volume (L)'].sum().reset_index()
-                # Urutkan bulan secara kronologis
-                volume_per_bulan['BulanSort'] = pd.to_datetime(volume_per_bulan[volume_per_bulan.columns[0]], format='%b %Y')
-                volume_per_bulan = volume_per_bulan.sort_values('BulanSort')
-                fig3 = px.line(volume_per_bulan, x=volume_per_bulan.columns[0], y='Volume (L)',
-                             title='Volume Air per Bulan (Detail)',
-                             markers=True,
-                             height=350)
-                fig3.update_traces(line=dict(color='#1f77b4', width=3))
-                fig3.update_layout(margin=dict(l=0, r=0, t=30, b=0), xaxis_title='Bulan', yaxis_title='Volume (L)')
+                # Volume per hari / minggu / bulan (Line Chart)
+                def build_fig3():
+                    volume_per_bulan = tren(dataset, pilihan, freq)
+                    fig3 = px.line(volume_per_bulan, x=volume_per_bulan.columns[0], y='Volume (L)',
+                                 title=f'Volume Air per {satuan} (Detail)',
+                                 markers=True,
+                                 height=350)
+                    fig3.update_traces(line=dict(color='#1f77b4', width=3))
+                    fig3.update_layout(margin=dict(l=0, r=0, t=30, b=0), xaxis_title=satuan, yaxis_title='Volume (L)')
+                    return fig3
+                fig3 = cached_figure(f'volume_{granularitas.lower()}', build_fig3)
                 st.plotly_chart(fig3, use_container_width=True)
         
         else:  # Peta Pengiriman
-            # Ambil data pengiriman dengan koordinat valid
-            df_pengiriman = df_merged_filtered[df_merged_filtered['Jenis Transaksi'].str.contains('Air|air|Pengiriman|pengiriman', na=False)].dropna(subset=['Latitude', 'Longitude'])
-            
-            if len(df_pengiriman) == 0:
-                # Jika tidak ada data dengan filter jenis transaksi, gunakan semua data dengan koordinat valid
-                df_pengiriman = df_merged_filtered.dropna(subset=['Latitude', 'Longitude'])
+            # Ambil agregat pengiriman per lokasi dengan koordinat valid (cache bersama per filter)
+            with span('load_deliveries', cached=True):
+                _, df_pengiriman = load_deliveries(dataset.versi_data, filter_key, cube_filtered, dataset.df_lokasi, dataset.order_lokasi)
             
             if len(df_pengiriman) > 0:
                 col1, col2 = st.columns([1, 2])
@@ -291,133 +328,242 @@ if df_keuangan is not None:
                 with col1:
                     st.subheader("📊 Volume Air Terkirim per Toko")
                     # Grouping berdasarkan lokasi dan sum volume air
-                    lokasi_volume = df_pengiriman.groupby('Order')['Volume (L)'].sum().sort_values(ascending=False).head(10).reset_index()
-                    lokasi_volume.columns = ['Lokasi', 'Volume Air Terkirim (L)']
+                    def build_fig_lokasi():
+                        lokasi_volume = top_lokasi_volume(df_pengiriman)
                     
-                    fig_lokasi = px.bar(lokasi_volume, x='Volume Air Terkirim (L)', y='Lokasi',
-                                       orientation='h', 
-                                       title='Top 10 Toko - Volume Air Terkirim',
-                                       height=300)
-                    fig_lokasi.update_layout(margin=dict(l=0, r=0, t=30, b=0))
+                        fig_lokasi = hbar_figure(lokasi_volume, 'Volume Air Terkirim (L)', 'Lokasi', 'Top 10 Toko - Volume Air Terkirim', height=300)
+                        return fig_lokasi
+                    fig_lokasi = cached_figure('pengiriman_top_toko', build_fig_lokasi)
                     st.plotly_chart(fig_lokasi, use_container_width=True)
                     
                 with col2:
                     st.subheader("🗺️ Peta Pengiriman")
                     # Peta dengan size dan warna berdasarkan volume air
-                    df_map = df_pengiriman.groupby(['Latitude', 'Longitude', 'Order']).agg({
-                        'Volume (L)': 'sum',
-                        'Pemasukan': 'sum',
-                        'Order': 'count'  # hitung jumlah order per lokasi
-                    }).rename(columns={'Order': 'Jumlah Order'}).reset_index()
-                    
-                    fig_map = px.scatter_mapbox(df_map, 
-                                          lat="Latitude", lon="Longitude",
-                                          size="Volume (L)", 
-                                          color="Volume (L)",
-                                          color_continuous_scale="Reds",
-                                          hover_name="Order",
-                                          hover_data={'Volume (L)': ':,.0f', 'Jumlah Order': True, 'Pemasukan': ':,.0f'},
-                                          mapbox_style="open-street-map",
-                                          height=350,
-                                          zoom=10)
-                    fig_map.update_layout(margin=dict(l=0, r=0, t=0, b=0))
+                    zoom = st.select_slider("Zoom Peta:", options=list(range(4, 17)), value=DEFAULT_ZOOM, key='zoom_pengiriman_peta')
+                    # Lokasi yang terlalu banyak dikelompokkan per sel grid agar ukuran peta tetap terbatas
+                    with span('load_map_points', cached=True):
+                        df_map, zoom_grid = load_map_points(dataset.versi_data, filter_key, zoom, df_pengiriman)
+                    def build_fig_map():
+                        hover_data = {'Volume (L)': ':,.0f', 'Jumlah Order': True, 'Pemasukan': ':,.0f'}
+                        if zoom_grid is not None:
+                            hover_data[JUMLAH_LOKASI] = True
+                        fig_map = px.scatter_mapbox(df_map, 
+                                              lat="Latitude", lon="Longitude",
+                                              size="Volume (L)", 
+                                              color="Volume (L)",
+                                              color_continuous_scale="Reds",
+                                              hover_name="Order",
+                                              hover_data=hover_data,
+                                              mapbox_style="open-street-map",
+                                              height=350,
+                                              zoom=zoom)
+                        fig_map.update_layout(margin=dict(l=0, r=0, t=0, b=0))
+                        return fig_map
+                    fig_map = cached_figure(f'pengiriman_peta_{zoom}', build_fig_map)
                     st.plotly_chart(fig_map, use_container_width=True)
+                    if zoom_grid is not None:
+                        st.caption(f"{df_map[JUMLAH_LOKASI].sum():,} lokasi dikelompokkan menjadi {len(df_map):,} sel grid (zoom {zoom_grid})")
             else:
                 st.warning("Tidak ada data pengiriman air dengan koordinat untuk filter yang dipilih")
 
     # --- TAB 3: DEMOGRAFI & PETA PENGIRIMAN ---
-    with tab3:
+    elif halaman == TAB_PETA:
         st.header("🌍 Peta & Demografi Pengiriman")
+
+        # Agregat per lokasi dari cache bersama, dipakai debug info dan peta
+        with span('load_deliveries', cached=True):
+            df_located, df_pengiriman = load_deliveries(dataset.versi_data, filter_key, cube_filtered, dataset.df_lokasi, dataset.order_lokasi)
         
         # DEBUG INFO - Informasi untuk troubleshooting
         with st.expander("🔍 Debug Info - Klik untuk melihat detail data"):
             st.write("**1. Jenis Transaksi yang tersedia:**")
-            jenis_transaksi_unique = df_merged_filtered['Jenis Transaksi'].value_counts()
+            jenis_transaksi_unique = value_counts(cube_filtered, 'Jenis Transaksi')
             st.write(jenis_transaksi_unique)
             
             st.write("**2. Total data setelah filter:**")
-            st.write(f"Total baris df_merged_filtered: {len(df_merged_filtered)}")
+            st.write(f"Total baris data setelah filter: {kpi[COUNT]}")
             
             st.write("**3. Data yang memiliki koordinat:**")
-            data_dengan_koordinat = df_merged_filtered.dropna(subset=['Latitude', 'Longitude'])
-            st.write(f"Data dengan Latitude/Longitude: {len(data_dengan_koordinat)}")
+            data_dengan_koordinat = df_located.dropna(subset=['Latitude', 'Longitude'])[COUNT].sum()
+            st.write(f"Data dengan Latitude/Longitude: {data_dengan_koordinat}")
             
             st.write("**4. Data pengiriman air:**")
-            data_pengiriman_all = df_merged_filtered[df_merged_filtered['Jenis Transaksi'].str.contains('Air|air|Pengiriman|pengiriman', na=False)]
-            st.write(f"Data yang mengandung kata 'Air' atau 'Pengiriman': {len(data_pengiriman_all)}")
+            jumlah_pengiriman = df_located.loc[is_delivery(df_located['Jenis Transaksi']), COUNT].sum()
+            st.write(f"Data yang mengandung kata 'Air' atau 'Pengiriman': {jumlah_pengiriman}")
+
+            st.write("**5. Pencocokan Order ke Nama Lokasi:**")
+            # Tabel pencocokan dihitung sekali per versi data; di sini hanya dibatasi ke pengiriman pada filter aktif
+            # (semua transaksi jika tidak ada jenis pengiriman, sama seperti data peta)
+            mask_pengiriman = is_delivery(df_located['Jenis Transaksi'])
+            if not mask_pengiriman.any():
+                mask_pengiriman[:] = True
+            per_order = df_located.loc[mask_pengiriman].groupby('Order', observed=True)[COUNT].sum()
+            per_order = per_order[per_order > 0]
+            if len(per_order) > 0:
+                cocok_order = dataset.pencocokan_lokasi.loc[per_order.index]
+                cocok = (cocok_order[CARA] != 'tidak cocok').to_numpy()
+                st.write(f"Nama Order yang cocok: {cocok.sum()} dari {len(cocok)} ({cocok.mean():.1%}), "
+                         f"transaksi: {per_order[cocok].sum()} dari {per_order.sum()} ({per_order[cocok].sum() / per_order.sum():.1%})")
+                # Nama yang tidak persis sama dengan sheet lokasi, untuk diperiksa atau diperbaiki di sumbernya
+                tidak_persis = cocok_order[cocok_order[CARA] != 'tepat']
+                if len(tidak_persis) > 0:
+                    st.dataframe(tidak_persis.assign(**{
+                        'Nama Lokasi': tidak_persis[LOKASI_ID].map(dataset.df_lokasi['Nama Lokasi']),
+                        'Transaksi': per_order.loc[tidak_persis.index].to_numpy(),
+                        SKOR: tidak_persis[SKOR].round(2),
+                    })[['Nama Lokasi', CARA, SKOR, 'Transaksi']])
             
-            if len(data_pengiriman_all) > 0:
+            if jumlah_pengiriman > 0:
                 st.write("**Sample data pengiriman:**")
-                st.dataframe(data_pengiriman_all[['Jenis Transaksi', 'Order', 'Latitude', 'Longitude']].head())
-        
-        # Ambil data pengiriman dengan koordinat valid
-        df_pengiriman = df_merged_filtered[df_merged_filtered['Jenis Transaksi'].str.contains('Air|air|Pengiriman|pengiriman', na=False)].dropna(subset=['Latitude', 'Longitude'])
-        
-        if len(df_pengiriman) == 0:
-            # Jika tidak ada data dengan filter jenis transaksi, gunakan semua data dengan koordinat valid
-            df_pengiriman = df_merged_filtered.dropna(subset=['Latitude', 'Longitude'])
+                # Contoh baris mentah hanya diambil saat memang ada data pengiriman
+                df_baris = dataset.df_keuangan.iloc[baris]
+                mask = is_delivery(df_baris['Jenis Transaksi'])
+                for dim, value in filters.items():
+                    if value is not None:
+                        mask &= (df_baris[dim] == value).fillna(False)
+                sample = df_baris.loc[mask, ['Jenis Transaksi', 'Order']].head()
+                st.dataframe(attach_coordinates(sample, dataset.df_lokasi, dataset.order_lokasi)[['Jenis Transaksi', 'Order', 'Latitude', 'Longitude']])
         
         if len(df_pengiriman) > 0:
             col1, col2 = st.columns([1, 2])
             
             with col1:
                 st.subheader("📊 Sebaran Order")
-                lokasi_counts = df_pengiriman['Order'].value_counts().head(10).reset_index()
-                lokasi_counts.columns = ['Lokasi', 'Jumlah Order']
+                def build_fig_lokasi():
+                    lokasi_counts = top_lokasi_order(df_pengiriman)
                 
-                fig_lokasi = px.bar(lokasi_counts, x='Jumlah Order', y='Lokasi',
-                                   orientation='h', 
-                                   title='Top 10 Lokasi Pengiriman',
-                                   height=280)
-                fig_lokasi.update_layout(margin=dict(l=0, r=0, t=30, b=0))
+                    fig_lokasi = hbar_figure(lokasi_counts, 'Jumlah Order', 'Lokasi', 'Top 10 Lokasi Pengiriman', height=280)
+                    return fig_lokasi
+                fig_lokasi = cached_figure('peta_top_lokasi', build_fig_lokasi)
                 st.plotly_chart(fig_lokasi, use_container_width=True)
                 
                
             with col2:
                 st.subheader("🗺️ Peta Pengiriman")
                 # Peta dengan size dan warna berdasarkan jumlah order
-                df_map = df_pengiriman.groupby(['Latitude', 'Longitude', 'Order']).agg({
-                    'Volume (L)': 'sum',
-                    'Pemasukan': 'sum',
-                    'Order': 'count'  # hitung jumlah order per lokasi
-                }).rename(columns={'Order': 'Jumlah Order'}).reset_index()
-                
-                fig_map = px.scatter_mapbox(df_map, 
-                                      lat="Latitude", lon="Longitude",
-                                      size="Jumlah Order", 
-                                      color="Jumlah Order",
-                                      color_continuous_scale="Blues",
-                                      hover_name="Order",
-                                      hover_data={'Volume (L)': ':,.0f', 'Jumlah Order': True, 'Pemasukan': ':,.0f'},
-                                      mapbox_style="open-street-map",
-                                      height=350,
-                                      zoom=10)
-                fig_map.update_layout(margin=dict(l=0, r=0, t=0, b=0))
+                zoom = st.select_slider("Zoom Peta:", options=list(range(4, 17)), value=DEFAULT_ZOOM, key='zoom_peta_order')
+                # Lokasi yang terlalu banyak dikelompokkan per sel grid agar ukuran peta tetap terbatas
+                with span('load_map_points', cached=True):
+                    df_map, zoom_grid = load_map_points(dataset.versi_data, filter_key, zoom, df_pengiriman)
+                def build_fig_map():
+                    hover_data = {'Volume (L)': ':,.0f', 'Jumlah Order': True, 'Pemasukan': ':,.0f'}
+                    if zoom_grid is not None:
+                        hover_data[JUMLAH_LOKASI] = True
+                    fig_map = px.scatter_mapbox(df_map, 
+                                          lat="Latitude", lon="Longitude",
+                                          size="Jumlah Order", 
+                                          color="Jumlah Order",
+                                          color_continuous_scale="Blues",
+                                          hover_name="Order",
+                                          hover_data=hover_data,
+                                          mapbox_style="open-street-map",
+                                          height=350,
+                                          zoom=zoom)
+                    fig_map.update_layout(margin=dict(l=0, r=0, t=0, b=0))
+                    return fig_map
+                fig_map = cached_figure(f'peta_order_{zoom}', build_fig_map)
                 st.plotly_chart(fig_map, use_container_width=True)
+                if zoom_grid is not None:
+                    st.caption(f"{df_map[JUMLAH_LOKASI].sum():,} lokasi dikelompokkan menjadi {len(df_map):,} sel grid (zoom {zoom_grid})")
         else:
             st.warning("Tidak ada data pengiriman air untuk filter yang dipilih")
 
+        # Analisis jarak dan area layanan lewat indeks spasial lokasi (dibangun sekali per versi data)
+        if len(dataset.indeks_lokasi) > 0:
+            st.subheader("📍 Analisis Jarak & Area Layanan")
+            # Pengiriman per lokasi untuk filter aktif; lokasi tanpa pengiriman bernilai 0
+            per_lokasi = rollup(df_pengiriman, LOKASI_ID)[['Volume (L)', 'Pemasukan', COUNT]]
+            per_lokasi = per_lokasi.reindex(dataset.df_lokasi.index, fill_value=0).rename(columns={COUNT: 'Jumlah Order'})
+            nama_lokasi = dataset.df_lokasi['Nama Lokasi']
+            lokasi_valid = dataset.df_lokasi.dropna(subset=['Latitude', 'Longitude'])
+            pilihan_lokasi = lokasi_valid['Nama Lokasi'].tolist()
+
+            def tabel_lokasi(ids, jarak):
+                # Nama, jarak dan pengiriman untuk hasil kueri indeks spasial
+                tabel = per_lokasi.loc[np.asarray(ids)].reset_index()
+                tabel.insert(1, 'Nama Lokasi', nama_lokasi.loc[ids].to_numpy())
+                tabel.insert(2, 'Jarak (km)', np.round(jarak, 2))
+                return tabel
+
+            radius_tab, terdekat_tab, area_tab = st.tabs([
+                "🎯 Dalam Radius",
+                "📌 Lokasi Terdekat",
+                "🗂️ Area Layanan"
+            ])
+
+            # Lokasi dalam radius dari satu lokasi, atau dari setiap titik rute pada filter aktif
+            with radius_tab:
+                RUTE = 'Rute (lokasi pengiriman sesuai filter)'
+                col1, col2 = st.columns(2)
+                pusat = col1.selectbox("Pusat:", [RUTE] + pilihan_lokasi, key='radius_pusat')
+                radius_km = col2.slider("Radius (km):", 1, 50, 5, key='radius_km')
+                if pusat == RUTE:
+                    titik = df_pengiriman[['Latitude', 'Longitude']].drop_duplicates()
+                else:
+                    titik = lokasi_valid[lokasi_valid['Nama Lokasi'] == pusat]
+                _, ids, jarak = dataset.indeks_lokasi.query_radius(titik['Latitude'], titik['Longitude'], radius_km)
+                # Untuk rute, jarak dihitung ke titik rute terdekat
+                terdekat = pd.Series(jarak).groupby(ids).min().sort_values()
+                tabel = tabel_lokasi(terdekat.index, terdekat.to_numpy())
+                col1.metric("Lokasi dalam Radius", len(tabel))
+                col2.metric("Volume Terkirim dalam Radius", f"{tabel['Volume (L)'].sum():,.0f} L")
+                st.dataframe(tabel, hide_index=True, use_container_width=True)
+
+            with terdekat_tab:
+                col1, col2 = st.columns(2)
+                pusat = col1.selectbox("Lokasi:", pilihan_lokasi, key='terdekat_pusat')
+                k = int(col2.number_input("Jumlah Lokasi Terdekat:", min_value=1, max_value=len(dataset.indeks_lokasi),
+                                          value=min(5, len(dataset.indeks_lokasi)), key='terdekat_k'))
+                titik = lokasi_valid[lokasi_valid['Nama Lokasi'] == pusat]
+                # Satu tambahan karena lokasi itu sendiri (jarak 0) ikut terambil
+                _, ids, jarak = dataset.indeks_lokasi.nearest(titik['Latitude'], titik['Longitude'], k + 1)
+                lain = ids != titik.index[0]
+                st.dataframe(tabel_lokasi(ids[lain][:k], jarak[lain][:k]), hide_index=True, use_container_width=True)
+
+            # Setiap lokasi dilayani pusat layanan terdekat (default: semua depot)
+            with area_tab:
+                default_pusat = [nama for nama in pilihan_lokasi if nama.lower().startswith('depot')] or pilihan_lokasi[:1]
+                pusat_layanan = st.multiselect("Pusat Layanan:", pilihan_lokasi, default=default_pusat, key='area_pusat')
+                if pusat_layanan:
+                    indeks_pusat = build_location_index(lokasi_valid[lokasi_valid['Nama Lokasi'].isin(pusat_layanan)])
+                    kueri, pusat_ids, jarak = indeks_pusat.nearest(lokasi_valid['Latitude'], lokasi_valid['Longitude'])
+                    area = per_lokasi.loc[lokasi_valid.index[kueri]].assign(**{
+                        'Area Layanan': nama_lokasi.loc[pusat_ids].to_numpy(),
+                        'Jarak ke Pusat (km)': jarak,
+                    })
+                    ringkasan = area.groupby('Area Layanan').agg(**{
+                        'Jumlah Lokasi': ('Volume (L)', 'size'),
+                        'Volume (L)': ('Volume (L)', 'sum'),
+                        'Pemasukan': ('Pemasukan', 'sum'),
+                        'Jumlah Order': ('Jumlah Order', 'sum'),
+                        'Jarak Rata-rata (km)': ('Jarak ke Pusat (km)', 'mean'),
+                    }).sort_values('Volume (L)', ascending=False).reset_index()
+
+                    def build_fig_area():
+                        fig_area = hbar_figure(ringkasan, 'Volume (L)', 'Area Layanan', 'Volume Terkirim per Area Layanan', height=300)
+                        return fig_area
+                    fig_area = cached_figure(f"area_layanan_{'|'.join(sorted(pusat_layanan))}", build_fig_area)
+                    st.plotly_chart(fig_area, use_container_width=True)
+                    st.dataframe(ringkasan.round({'Jarak Rata-rata (km)': 2}), hide_index=True, use_container_width=True)
+                else:
+                    st.info("Pilih minimal satu pusat layanan")
+
     # --- TAB 4: ANALISIS ARMADA ---
-    with tab4:
+    elif halaman == TAB_ARMADA:
         st.header("🚚 Analisis Armada")
         # Filter armada yang valid (tidak mengandung #### atau tidak diketahui)
-        df_armada = df_filtered[
-            (df_filtered['Plat Nomor'] != 'Tidak Diketahui') & 
-            (~df_filtered['Plat Nomor'].str.contains('####', na=False))
-        ]
+        df_armada = armada_valid(cube_filtered)
         
         if len(df_armada) > 0:
             # KPI Armada Utama
             col1, col2, col3, col4 = st.columns(4)
-            total_armada = df_armada['Plat Nomor'].nunique()
-            armada_terbanyak = df_armada['Plat Nomor'].value_counts().index[0]
-            usage_terbanyak = df_armada['Plat Nomor'].value_counts().iloc[0]
-            total_volume_armada = df_armada['Volume (L)'].sum()
+            armada_counts = frekuensi_armada(df_armada)
+            kpi_armada = armada_kpi(df_armada, armada_counts)
             
-            col1.metric("Total Armada Aktif", total_armada)
-            col2.metric("Armada Terbanyak Digunakan", armada_terbanyak)
-            col3.metric("Jumlah Penggunaan Tertinggi", f"{usage_terbanyak} kali")
-            col4.metric("Total Volume Terangkut", f"{total_volume_armada:,.0f} L")
+            col1.metric("Total Armada Aktif", kpi_armada['Total Armada Aktif'])
+            col2.metric("Armada Terbanyak Digunakan", kpi_armada['Armada Terbanyak Digunakan'])
+            col3.metric("Jumlah Penggunaan Tertinggi", f"{kpi_armada['Jumlah Penggunaan Tertinggi']} kali")
+            col4.metric("Total Volume Terangkut", f"{kpi_armada['Total Volume Terangkut']:,.0f} L")
             
             # Sub-tabs untuk analisis armada yang berbeda
             armada_tab1, armada_tab2 = st.tabs([
@@ -432,87 +578,117 @@ if df_keuangan is not None:
                 col1, col2 = st.columns(2)
                 with col1:
                     # Frekuensi penggunaan armada
-                    armada_usage = df_armada['Plat Nomor'].value_counts().head(8).reset_index()
-                    armada_usage.columns = ['Armada', 'Jumlah Penggunaan']
+                    def build_fig_armada():
+                        armada_usage = armada_counts.head(8)
                     
-                    fig_armada = px.bar(armada_usage, x='Jumlah Penggunaan', y='Armada',
-                                       orientation='h', title='Frekuensi Penggunaan Armada',
-                                       height=300)
-                    fig_armada.update_layout(margin=dict(l=0, r=0, t=30, b=0))
+                        fig_armada = hbar_figure(armada_usage, 'Jumlah Penggunaan', 'Armada', 'Frekuensi Penggunaan Armada', height=300)
+                        return fig_armada
+                    fig_armada = cached_figure('armada_frekuensi', build_fig_armada)
                     st.plotly_chart(fig_armada, use_container_width=True)
                 
                 with col2:
                     # Estimasi biaya perawatan per armada
-                    armada_stats = df_armada.groupby('Plat Nomor').agg({
-                        'Pemasukan': 'sum',
-                        'Pengeluaran': 'sum',
-                        'Volume (L)': 'sum'
-                    }).reset_index()
-                    armada_stats['Estimasi Biaya Perawatan'] = armada_stats['Pengeluaran'] * 0.15  # 15% dari pengeluaran
-                    armada_stats = armada_stats.sort_values('Estimasi Biaya Perawatan', ascending=False).head(8)
+                    def build_fig_perawatan():
+                        armada_stats = biaya_perawatan(df_armada).head(8)
                     
-                    fig_perawatan = px.bar(armada_stats, x='Estimasi Biaya Perawatan', y='Plat Nomor',
-                                          orientation='h', title='Estimasi Biaya Perawatan per Armada',
-                                          height=300)
-                    fig_perawatan.update_layout(margin=dict(l=0, r=0, t=30, b=0))
+                        fig_perawatan = hbar_figure(armada_stats, 'Estimasi Biaya Perawatan', 'Plat Nomor', 'Estimasi Biaya Perawatan per Armada', height=300)
+                        return fig_perawatan
+                    fig_perawatan = cached_figure('armada_perawatan', build_fig_perawatan)
                     st.plotly_chart(fig_perawatan, use_container_width=True)
             
             # Sub-tab 2: Volume & Efisiensi
             with armada_tab2:
                 st.subheader("🚛 Volume & Efisiensi Pengangkutan")
                 
-                # Hanya menampilkan rata-rata volume per bulan per armada
-                df_armada_bulan = df_armada.groupby(['Plat Nomor', 'Bulan'])['Volume (L)'].sum().reset_index()
-                avg_volume_per_month = df_armada_bulan.groupby('Plat Nomor')['Volume (L)'].mean().sort_values(ascending=False).head(10).reset_index()
-                avg_volume_per_month.columns = ['Armada', 'Rata-rata Volume per Bulan (L)']
+                # Hanya menampilkan rata-rata volume per periode (hari / minggu / bulan) per armada
+                def build_fig_avg_volume():
+                    avg_volume_per_month = rata_volume_armada(dataset, pilihan, freq, armada_counts['Armada'], satuan).head(10)
                 
-                fig_avg_volume = px.bar(avg_volume_per_month, x='Rata-rata Volume per Bulan (L)', y='Armada',
-                                       orientation='h', title='Rata-rata Volume per Bulan per Armada',
-                                       height=400)
-                fig_avg_volume.update_layout(margin=dict(l=0, r=0, t=30, b=0))
+                    fig_avg_volume = hbar_figure(avg_volume_per_month, f'Rata-rata Volume per {satuan} (L)', 'Armada', f'Rata-rata Volume per {satuan} per Armada', height=400)
+                    return fig_avg_volume
+                fig_avg_volume = cached_figure(f'armada_volume_{granularitas.lower()}', build_fig_avg_volume)
                 st.plotly_chart(fig_avg_volume, use_container_width=True)
                 
         else:
             st.warning("Tidak ada data armada untuk filter yang dipilih")
 
     # --- TAB 5: KINERJA SOPIR ---
-    with tab5:
+    elif halaman == TAB_SOPIR:
         st.header("👤 Kinerja Sopir")
-        df_sopir = df_filtered[df_filtered['Sopir'] != 'Tidak Diketahui']
+        df_sopir = sopir_valid(cube_filtered)
         
         if len(df_sopir) > 0:
             # KPI Sopir
             col1, col2, col3 = st.columns(3)
-            total_sopir = df_sopir['Sopir'].nunique()
-            sopir_terbaik = df_sopir['Sopir'].value_counts().index[0]
-            tugas_terbanyak = df_sopir['Sopir'].value_counts().iloc[0]
+            sopir_counts_all = tugas_sopir(df_sopir)
+            kpi_sopir = sopir_kpi(sopir_counts_all)
             
-            col1.metric("Total Sopir Aktif", total_sopir)
-            col2.metric("Sopir Terbaik", sopir_terbaik)
-            col3.metric("Jumlah Tugas", f"{tugas_terbanyak} tugas")
+            col1.metric("Total Sopir Aktif", kpi_sopir['Total Sopir Aktif'])
+            col2.metric("Sopir Terbaik", kpi_sopir['Sopir Terbaik'])
+            col3.metric("Jumlah Tugas", f"{kpi_sopir['Jumlah Tugas']} tugas")
             
             col1, col2 = st.columns(2)
             
             with col1:
                 # Kinerja sopir
-                sopir_counts = df_sopir['Sopir'].value_counts().head(8).reset_index()
-                sopir_counts.columns = ['Sopir', 'Jumlah Tugas']
+                def build_fig_sopir():
+                    sopir_counts = sopir_counts_all.head(8)
                 
-                fig_sopir = px.bar(sopir_counts, x='Jumlah Tugas', y='Sopir',
-                                  orientation='h', title='Kinerja Sopir (Total Tugas)',
-                                  height=350)
-                fig_sopir.update_layout(margin=dict(l=0, r=0, t=30, b=0))
+                    fig_sopir = hbar_figure(sopir_counts, 'Jumlah Tugas', 'Sopir', 'Kinerja Sopir (Total Tugas)', height=350)
+                    return fig_sopir
+                fig_sopir = cached_figure('sopir_tugas', build_fig_sopir)
                 st.plotly_chart(fig_sopir, use_container_width=True)
             
             with col2:
                 # Pemasukan per sopir
-                pemasukan_sopir = df_sopir.groupby('Sopir')['Pemasukan'].sum().sort_values(ascending=False).head(8).reset_index()
-                pemasukan_sopir.columns = ['Sopir', 'Total Pemasukan']
+                def build_fig_pemasukan_sopir():
+                    top_pemasukan = pemasukan_sopir(df_sopir).head(8)
                 
-                fig_pemasukan_sopir = px.bar(pemasukan_sopir, x='Total Pemasukan', y='Sopir',
-                                            orientation='h', title='Total Pemasukan per Sopir',
-                                            height=350)
-                fig_pemasukan_sopir.update_layout(margin=dict(l=0, r=0, t=30, b=0))
+                    fig_pemasukan_sopir = hbar_figure(top_pemasukan, 'Total Pemasukan', 'Sopir', 'Total Pemasukan per Sopir', height=350)
+                    return fig_pemasukan_sopir
+                fig_pemasukan_sopir = cached_figure('sopir_pemasukan', build_fig_pemasukan_sopir)
                 st.plotly_chart(fig_pemasukan_sopir, use_container_width=True)
         else:
-            st.warning("Tidak ada data sopir untuk filter yang dipilih")
\ No newline at end of file
+            st.warning("Tidak ada data sopir untuk filter yang dipilih")
+
+    page_span.stop(rows=kpi[COUNT])
+
+    # Statistik cache grafik (di akhir skrip agar sudah termasuk rerun ini)
+    with st.sidebar:
+        with st.expander('🛠️ Admin - Dataset'):
+            dataset_store = get_dataset_store()
+            status = dataset_store.status()
+            st.write(f"Versi data: `{status['versi_data']}`")
+            st.write(f"Dimuat: {pd.Timestamp(status['loaded_at'], unit='s', tz='UTC'):%Y-%m-%d %H:%M:%S} UTC "
+                     f"(total {status['reloads']}x)")
+            st.caption(f"File sumber diperiksa setiap {status['poll_seconds']:g} detik.")
+            if dataset.sumber:
+                df_sumber = pd.DataFrame(dataset.sumber).rename(columns={'file': 'File', 'rows': 'Baris', 'seconds': 'Detik', 'error': 'Error'})
+                st.dataframe(df_sumber, hide_index=True)
+            if status['last_error']:
+                st.warning(f"Pemuatan ulang terakhir gagal, versi lama tetap dipakai: {status['last_error']}")
+            if st.button("Periksa file sekarang"):
+                dataset_store.refresh_if_changed()
+
+        with st.expander('🛠️ Admin - Cache Grafik'):
+            stats = figure_cache.stats()
+            col1, col2 = st.columns(2)
+            col1.metric("Hit", f"{stats['hits']:,}")
+            col2.metric("Miss", f"{stats['misses']:,}")
+            st.write(f"Hit rate: **{stats['hit_rate']:.1%}**")
+            st.write(f"Isi cache: {stats['size']} / {stats['maxsize']} grafik (dibuang: {stats['evictions']})")
+            if st.button("Kosongkan cache grafik"):
+                figure_cache.clear()
+
+    # Panel diagnostik (hanya jika instrumentasi aktif); rerun ini juga ditulis ke file metrik
+    metrik_rerun = finish_rerun(halaman=halaman, filters=filters)
+    if metrik_rerun is not None:
+        with st.sidebar:
+            with st.expander('🩺 Diagnostik Performa', expanded=True):
+                df_spans = pd.DataFrame(metrik_rerun['spans'])
+                df_spans['ms'] = (df_spans.pop('seconds') * 1000).round(2)
+                st.dataframe(df_spans, hide_index=True)
+                st.write(f"Total rerun: **{metrik_rerun['total_seconds'] * 1000:,.1f} ms**")
+                if metrik_rerun['counters']:
+                    st.write(metrik_rerun['counters'])
+                st.caption(f"Metrik setiap rerun ditambahkan ke `{METRICS_FILE}` (JSON lines).")
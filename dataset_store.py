@@ -0,0 +1,188 @@
+"""Dataset bersama untuk semua sesi dasbor, diperbarui di background saat file sumber berubah.
+
+Setiap sesi membaca referensi ke objek Dataset yang sama (tanpa salinan). Thread
+pemantau memeriksa ukuran dan mtime file serta manifest batch ingest.py secara berkala;
+jika berubah, dataset baru dibangun di thread tersebut lalu referensinya ditukar
+sekaligus. Sesi yang sedang berjalan tetap memakai versi lama sampai rerun berikutnya.
+
+Pemanasan sebelum server dijalankan (menulis snapshot agar permintaan pertama tidak
+membaca dan membersihkan file Excel):
+    python dataset_store.py && streamlit run dashboard.py
+"""
+import os
+import sys
+import threading
+import time
+from typing import NamedTuple
+
+import pandas as pd
+
+from cube import build_cube
+from geoindex import GeoIndex, build_location_index
+from ingest import INGEST_DIR, apply_batches, manifest_mtime
+from instrumentation import note_cache_miss
+from locations import LOKASI_ID, build_location_dim, match_orders
+from pipeline import DATA_SOURCE, KEUANGAN_COLS, build_dataset, is_sorted_by_tanggal, memory_report, sort_by_tanggal, source_stat
+from quality import profile
+from snapshot import fingerprint_key
+from timeseries import build_series
+
+# Interval pemeriksaan perubahan file sumber (detik)
+POLL_SECONDS = float(os.environ.get('DASHBOARD_POLL_SECONDS', '30'))
+
+
+class Dataset(NamedTuple):
+    """Semua data turunan satu versi file sumber. Dibagi antar sesi: jangan diubah di tempat."""
+    df_keuangan: pd.DataFrame
+    df_lokasi: pd.DataFrame
+    order_lokasi: pd.Series
+    df_cube: pd.DataFrame
+    missing_report: dict
+    total_missing: int
+    memori: pd.DataFrame
+    versi_data: str
+    sumber: list
+    deret: dict
+    indeks_lokasi: GeoIndex
+    pencocokan_lokasi: pd.DataFrame
+    profil_awal: pd.DataFrame
+    profil_bersih: pd.DataFrame
+
+
+def load_dataset(source=DATA_SOURCE, use_snapshot=True, ingest_dir=INGEST_DIR):
+    """Membangun Dataset dari snapshot atau workbook sumber ditambah batch hasil ingest.py (tanpa Streamlit)."""
+    df_keuangan, df_lokasi, missing_report, profil_awal, fingerprint, sumber = build_dataset(source, use_snapshot)
+    df_keuangan, missing_report, profil_awal, df_cube, versi_data = apply_batches(
+        df_keuangan, missing_report, profil_awal, fingerprint_key(fingerprint), ingest_dir)
+    if not is_sorted_by_tanggal(df_keuangan):
+        # Batch dengan tanggal lebih awal dari riwayat: urutkan ulang, posisi baris di kubus tersimpan tidak berlaku lagi
+        df_keuangan, df_cube = sort_by_tanggal(df_keuangan), None
+
+    # Dimensi lokasi berkunci integer; koordinat baru ditempelkan pada agregat saat render
+    df_lokasi = build_location_dim(df_lokasi)
+    # Nama Order dicocokkan ke lokasi (persis, kunci dinormalisasi, lalu fuzzy) sekali per versi data
+    pencocokan_lokasi = match_orders(df_keuangan['Order'], df_lokasi)
+    order_lokasi = pencocokan_lokasi[LOKASI_ID]
+    # Indeks spasial koordinat lokasi untuk kueri radius, lokasi terdekat dan area layanan
+    indeks_lokasi = build_location_index(df_lokasi)
+
+    # Kubus agregat untuk KPI dan grafik, dihitung sekali per versi data (atau kubus tersimpan dari ingest)
+    if df_cube is None:
+        df_cube = build_cube(df_keuangan)
+
+    # Deret harian per Sopir / Plat Nomor; mingguan dan bulanan diturunkan dari deret harian
+    deret = build_series(df_keuangan)
+
+    # Profil kualitas data setelah pembersihan, pasangan profil_awal (data mentah)
+    profil_bersih = profile(df_keuangan, KEUANGAN_COLS)
+
+    # Memori dihitung sekali di sini karena memory_usage(deep=True) cukup mahal
+    memori = memory_report({'df_keuangan': df_keuangan, 'df_lokasi': df_lokasi, 'df_cube': df_cube,
+                            'deret_harian': deret['D']})
+
+    return Dataset(
+        df_keuangan, df_lokasi, order_lokasi, df_cube, missing_report,
+        # Versi data dipakai sebagai bagian kunci cache turunan
+        int(sum(missing_report.values())), memori, versi_data,
+        # Laporan per workbook: baris, waktu baca dan error (file yang gagal dilewati)
+        sumber, deret, indeks_lokasi, pencocokan_lokasi,
+        # Profil kualitas data sebelum dan sesudah pembersihan
+        profil_awal, profil_bersih,
+    )
+
+
+class DatasetStore:
+    """Pemegang Dataset terkini untuk satu sumber data (file, direktori atau pola glob).
+
+    get() tidak pernah menunggu pemuatan ulang kecuali belum ada dataset sama sekali.
+    Jika pemuatan ulang gagal (mis. file sedang disalin), versi lama tetap dipakai dan
+    percobaan diulang pada pemeriksaan berikutnya.
+    """
+
+    def __init__(self, source=DATA_SOURCE, poll_seconds=POLL_SECONDS, ingest_dir=INGEST_DIR):
+        self.source = source
+        self.ingest_dir = ingest_dir
+        self.poll_seconds = poll_seconds
+        self.reloads = 0
+        self.loaded_at = None
+        self.last_error = None
+        self._dataset = None
+        self._stat = None
+        self._load_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _file_stat(self):
+        # Workbook baru di direktori sumber dan batch baru dari ingest.py juga terdeteksi
+        return source_stat(self.source), manifest_mtime(self.ingest_dir)
+
+    def load(self):
+        """Membangun dataset baru lalu menukar referensinya; hanya satu pemuatan sekaligus."""
+        with self._load_lock:
+            note_cache_miss()
+            # Stat diambil sebelum membaca: perubahan selama pemuatan terdeteksi pada pemeriksaan berikutnya
+            stat = self._file_stat()
+            dataset = load_dataset(self.source, ingest_dir=self.ingest_dir)
+            self._dataset, self._stat = dataset, stat
+            self.reloads += 1
+            self.loaded_at = time.time()
+            self.last_error = None
+            return dataset
+
+    def get(self):
+        dataset = self._dataset
+        if dataset is None:
+            with self._load_lock:
+                dataset = self._dataset
+            if dataset is None:
+                dataset = self.load()
+        return dataset
+
+    def refresh_if_changed(self):
+        """Memuat ulang jika ukuran atau mtime file berubah; True jika versi baru dipasang."""
+        try:
+            if self._file_stat() == self._stat:
+                return False
+            self.load()
+        except Exception as e:
+            self.last_error = e
+            return False
+        return True
+
+    def start(self):
+        """Memuat dataset pertama (jika belum) lalu menjalankan thread pemantau."""
+        self.get()
+        if self._thread is None and self.poll_seconds > 0:
+            self._thread = threading.Thread(target=self._watch, name='dataset-refresh', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self):
+        while not self._stop_event.wait(self.poll_seconds):
+            self.refresh_if_changed()
+
+    def status(self):
+        dataset = self._dataset
+        return {
+            'versi_data': dataset.versi_data if dataset is not None else None,
+            'loaded_at': self.loaded_at,
+            'reloads': self.reloads,
+            'last_error': None if self.last_error is None else str(self.last_error),
+            'poll_seconds': self.poll_seconds,
+        }
+
+
+if __name__ == '__main__':
+    source = sys.argv[1] if len(sys.argv) > 1 else DATA_SOURCE
+    start = time.perf_counter()
+    dataset = load_dataset(source)
+    for report in dataset.sumber:
+        print(f"{report['seconds']:>8.2f} s  {report['rows']:>9,}  {report['file']}  {report['error'] or ''}")
+    print(f'{len(dataset.df_keuangan):,} transaksi siap (versi {dataset.versi_data}) '
+          f'dalam {time.perf_counter() - start:.2f} detik')
@@ -0,0 +1,243 @@
+"""Ekspor transaksi terfilter dan tabel agregat dasbor ke CSV, Parquet atau XLSX.
+
+Transaksi ditulis per potongan baris (EXPORT_CHUNK) langsung dari posisi baris hasil
+filter, sehingga tidak pernah ada salinan penuh data terfilter di memori. File hasil
+disimpan di EXPORT_DIR dengan kunci versi data + filter + format; unduhan berikutnya
+untuk tampilan yang sama langsung memakai file tersebut.
+
+Contoh:
+    python export.py --format parquet --output transaksi.parquet
+    python export.py --isi agregat --bulan 2024-03 --sopir "Pak Joko" --format xlsx --output maret.xlsx
+    python export.py --dari 2024-03-01 --sampai 2024-03-31 --output maret.csv
+"""
+import argparse
+import hashlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from datetime import date
+
+import pandas as pd
+from openpyxl import Workbook
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # ekspor Parquet dinonaktifkan jika pyarrow tidak tersedia
+    pa = pq = None
+
+from analytics import select, selection_rows, tab_tables
+from cube import COUNT
+from dataset_store import load_dataset
+from ingest import INGEST_DIR
+from pipeline import DATA_SOURCE, KEUANGAN_COLS, XLSX_MAX_ROWS, bulan_labels
+from timeindex import date_bounds
+from timeseries import GRANULARITAS
+
+# Lokasi file ekspor; bisa diganti lewat environment variable
+EXPORT_DIR = os.environ.get('DASHBOARD_EXPORT_DIR', '.cache/exports')
+# Jumlah baris transaksi yang disalin sekaligus saat menulis
+EXPORT_CHUNK = int(os.environ.get('DASHBOARD_EXPORT_CHUNK', '100000'))
+# File ekspor terlama dihapus jika jumlahnya melebihi batas ini
+MAX_EXPORT_FILES = 64
+
+FORMATS = ['csv', 'parquet', 'xlsx'] if pq is not None else ['csv', 'xlsx']
+# Isi ekspor: baris transaksi terfilter atau tabel agregat semua halaman
+ISI = ['transaksi', 'agregat']
+MIME = {
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'zip': 'application/zip',
+}
+
+
+def iter_chunks(df, rows, columns=None, chunk_rows=EXPORT_CHUNK):
+    """Potongan df.take(rows) berukuran paling banyak `chunk_rows`; minimal satu (mungkin kosong).
+
+    Kolom dipilih per potongan, bukan pada df: df[columns] menyalin seluruh tabel pada pandas < 3.
+    """
+    for start in range(0, max(len(rows), 1), chunk_rows):
+        chunk = df.take(rows[start:start + chunk_rows])
+        yield chunk if columns is None else chunk[columns]
+
+
+def export_extension(isi, fmt):
+    # Tabel agregat CSV / Parquet dikemas dalam satu zip (satu file per tabel)
+    return 'zip' if isi == 'agregat' and fmt != 'xlsx' else fmt
+
+
+def _require_pyarrow():
+    if pq is None:
+        raise RuntimeError('Ekspor Parquet membutuhkan paket pyarrow.')
+
+
+def write_csv(path, chunks):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(f, header=i == 0, index=False)
+
+
+def write_parquet(path, chunks):
+    _require_pyarrow()
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _excel_rows(chunk):
+    # Nilai Python biasa untuk openpyxl; nilai kosong menjadi sel kosong
+    values = chunk.astype(object).where(chunk.notna(), None)
+    return values.itertuples(index=False, name=None)
+
+
+def write_xlsx(path, sheets):
+    """Workbook mode write-only (baris ditulis bertahap); `sheets` berisi nama -> potongan tabel."""
+    workbook = Workbook(write_only=True)
+    for name, chunks in sheets.items():
+        sheet = workbook.create_sheet(title=name[:31])
+        for i, chunk in enumerate(chunks):
+            if i == 0:
+                sheet.append(list(chunk.columns))
+            for row in _excel_rows(chunk):
+                sheet.append(row)
+    workbook.save(path)
+
+
+def export_transactions(path, df_keuangan, rows, fmt):
+    """Menulis baris `rows` dari df_keuangan (kolom sumber saja) ke `path`."""
+    if fmt == 'xlsx' and len(rows) > XLSX_MAX_ROWS:
+        raise ValueError(f'Excel hanya menampung {XLSX_MAX_ROWS:,} baris per sheet; gunakan format csv atau parquet.')
+    chunks = iter_chunks(df_keuangan, rows, KEUANGAN_COLS)
+    if fmt == 'csv':
+        write_csv(path, chunks)
+    elif fmt == 'parquet':
+        write_parquet(path, chunks)
+    else:
+        write_xlsx(path, {'Transaksi': chunks})
+
+
+def export_tables(path, tables, fmt):
+    """Menulis tabel agregat: satu sheet per tabel (xlsx) atau satu file per tabel dalam zip."""
+    if fmt == 'xlsx':
+        write_xlsx(path, {name: [df] for name, df in tables.items()})
+        return
+    if fmt == 'parquet':
+        _require_pyarrow()
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, df in tables.items():
+            if fmt == 'csv':
+                archive.writestr(f'{name}.csv', df.to_csv(index=False))
+            else:
+                buffer = io.BytesIO()
+                pq.write_table(pa.Table.from_pandas(df, preserve_index=False), buffer)
+                archive.writestr(f'{name}.parquet', buffer.getvalue())
+
+
+def export_key(versi_data, key, isi, fmt, freq=None):
+    """Nama file cache untuk satu versi data, kombinasi filter, isi dan format."""
+    raw = repr((versi_data, key, isi, fmt, freq if isi == 'agregat' else None))
+    return f"{isi}-{hashlib.sha256(raw.encode()).hexdigest()[:24]}.{export_extension(isi, fmt)}"
+
+
+def _prune(export_dir, keep=MAX_EXPORT_FILES):
+    files = [e for e in os.scandir(export_dir) if e.is_file() and not e.name.startswith('.')]
+    if len(files) > keep:
+        for entry in sorted(files, key=lambda e: e.stat().st_mtime)[:len(files) - keep]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+def export_file(dataset, selection, isi='transaksi', fmt='csv', freq='M', export_dir=EXPORT_DIR):
+    """Path file ekspor untuk potongan ini; dibuat hanya jika belum ada di cache."""
+    path = os.path.join(export_dir, export_key(dataset.versi_data, selection.key, isi, fmt, freq))
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+    os.makedirs(export_dir, exist_ok=True)
+    # Ditulis ke file sementara lalu diganti namanya: sesi lain tidak pernah membaca file setengah jadi
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', dir=export_dir)
+    os.close(fd)
+    try:
+        if isi == 'transaksi':
+            export_transactions(tmp_path, dataset.df_keuangan, selection_rows(dataset.df_keuangan, selection), fmt)
+        else:
+            export_tables(tmp_path, tab_tables(dataset, selection, freq), fmt)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    _prune(export_dir)
+    return path
+
+
+def export_bytes(dataset, selection, isi='transaksi', fmt='csv', freq='M', export_dir=EXPORT_DIR):
+    """Isi file ekspor, untuk tombol unduh dasbor."""
+    with open(export_file(dataset, selection, isi, fmt, freq, export_dir), 'rb') as f:
+        return f.read()
+
+
+def export_name(selection, isi, fmt, rentang=None):
+    """Nama file unduhan yang menjelaskan filternya, mis. 'transaksi_2024-03_Pak_Joko.csv'."""
+    bagian = [isi]
+    if selection.filters.get('Bulan') is not None:
+        bagian.append(bulan_labels([selection.filters['Bulan']])[0])
+    if rentang is not None:
+        bagian.append(f'{rentang[0]:%Y%m%d}-{rentang[1]:%Y%m%d}')
+    bagian += [str(selection.filters[dim]) for dim in ('Sopir', 'Plat Nomor') if selection.filters.get(dim) is not None]
+    nama = '_'.join(bagian).replace(' ', '_')
+    return f'{nama}.{export_extension(isi, fmt)}'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Ekspor transaksi terfilter atau tabel agregat dasbor.')
+    parser.add_argument('--source', default=DATA_SOURCE, help='Workbook utama, direktori atau pola glob')
+    parser.add_argument('--ingest-dir', default=INGEST_DIR)
+    parser.add_argument('--isi', choices=ISI, default='transaksi')
+    parser.add_argument('--format', choices=FORMATS, default='csv')
+    parser.add_argument('--bulan', help='Bulan (YYYY-MM)')
+    parser.add_argument('--sopir')
+    parser.add_argument('--armada', help='Plat nomor')
+    parser.add_argument('--dari', type=date.fromisoformat, help='Tanggal awal (YYYY-MM-DD)')
+    parser.add_argument('--sampai', type=date.fromisoformat, help='Tanggal akhir (YYYY-MM-DD)')
+    parser.add_argument('--granularitas', choices=list(GRANULARITAS), default='Bulanan',
+                        help='Granularitas tabel deret (hanya untuk --isi agregat)')
+    parser.add_argument('--export-dir', default=EXPORT_DIR)
+    parser.add_argument('--output', help='File tujuan (default: nama dari filter di direktori kerja)')
+    args = parser.parse_args(argv)
+
+    try:
+        bulan = None if args.bulan is None else pd.Period(args.bulan, freq='M').ordinal
+    except ValueError as e:
+        parser.error(f'bulan tidak valid: {e}')
+
+    start = time.perf_counter()
+    dataset = load_dataset(args.source, ingest_dir=args.ingest_dir)
+    rentang = None
+    if args.dari or args.sampai:
+        # Batas yang tidak diisi memakai tanggal pertama / terakhir di data
+        awal, akhir = date_bounds(dataset.df_keuangan['Tanggal'])
+        rentang = (args.dari or awal, args.sampai or akhir)
+    selection = select(dataset, bulan=bulan, sopir=args.sopir, armada=args.armada, rentang=rentang)
+    path = export_file(dataset, selection, args.isi, args.format, GRANULARITAS[args.granularitas], args.export_dir)
+    output = args.output or export_name(selection, args.isi, args.format, rentang)
+    shutil.copyfile(path, output)
+    print(f"{selection.kpi[COUNT]:,} transaksi -> {output} ({os.path.getsize(output) / 2**20:,.2f} MB) "
+          f"dalam {time.perf_counter() - start:.2f} detik", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
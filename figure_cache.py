@@ -0,0 +1,54 @@
+import threading
+from collections import OrderedDict
+
+
+class FigureCache:
+    """Cache LRU berukuran tetap untuk objek grafik, aman dipakai bersama oleh banyak sesi.
+
+    Kunci biasanya berupa (versi data, kombinasi filter, nama grafik). Grafik dibangun di
+    luar lock sehingga sesi lain tidak menunggu; jika dua sesi membangun kunci yang sama
+    bersamaan, hasil yang terakhir disimpan.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+
+        value = build()
+
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+                'size': len(self._items),
+                'maxsize': self.maxsize,
+            }
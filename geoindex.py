@@ -0,0 +1,196 @@
+"""Indeks spasial grid untuk koordinat lokasi, dengan jarak haversine.
+
+Titik dikelompokkan ke sel grid berukuran tetap lalu diurutkan per sel (seperti format
+CSR), sehingga kueri hanya memeriksa titik di sel yang bersinggungan dengan area
+pencarian, bukan semua pasangan titik. Setiap kueri menerima banyak titik pusat sekaligus
+dan mengembalikan tiga array sejajar (nomor titik pusat, id titik, jarak km) yang terurut
+per titik pusat lalu jarak.
+"""
+import numpy as np
+
+from locations import COORD_COLS
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180
+# Setengah keliling bumi: radius yang mencakup semua titik
+MAX_RADIUS_KM = np.pi * EARTH_RADIUS_KM
+# Target jumlah titik per sel yang dilihat titik pada umumnya
+CELL_POINTS = 4
+# Jumlah titik pusat per potongan kueri, membatasi memori pasangan kandidat
+QUERY_CHUNK = 2048
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Jarak lingkaran besar (km) antar pasangan koordinat, tervektorisasi."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _extent_cell_km(lat, lon):
+    # Ukuran sel awal dari bentang data, seolah titik tersebar merata
+    if len(lat) < 2:
+        return 1.0
+    tinggi = np.ptp(lat) * KM_PER_DEGREE
+    lebar = np.ptp(lon) * KM_PER_DEGREE * np.cos(np.radians(np.mean(lat)))
+    return max(float(np.sqrt(max(tinggi, 1.0) * max(lebar, 1.0) * CELL_POINTS / len(lat))), 0.01)
+
+
+class GeoIndex:
+    """Indeks grid atas titik (lat, lon) berlabel `ids`; titik tanpa koordinat dilewati."""
+
+    def __init__(self, lat, lon, ids=None, cell_km=None):
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        ids = np.arange(len(lat)) if ids is None else np.asarray(ids)
+        valid = np.isfinite(lat) & np.isfinite(lon)
+        lat, lon, ids = lat[valid], lon[valid], ids[valid]
+
+        self.lat, self.lon, self.ids = lat, lon, ids
+        self._build(_extent_cell_km(lat, lon) if cell_km is None else cell_km)
+        if cell_km is None and self.occupancy > 4 * CELL_POINTS:
+            # Titik menumpuk di sebagian kecil area: perkecil sel sesuai kepadatan di sana
+            self._build(self.cell_km * np.sqrt(CELL_POINTS / self.occupancy))
+
+    def _build(self, cell_km):
+        # Lebar sel (derajat) dibulatkan agar 360 derajat bujur terbagi habis: kolom grid
+        # berputar di garis bujur 180 (kolom nlon sama dengan kolom 0)
+        self._nlon = max(int(np.ceil(360 * KM_PER_DEGREE / cell_km)), 1)
+        self._cell = 360 / self._nlon
+        self._nlat = int(np.ceil(180 / self._cell))
+        self.cell_km = self._cell * KM_PER_DEGREE
+
+        codes = self._codes(*self._grid(self.lat, self.lon))
+        urutan = np.argsort(codes, kind='stable')
+        self.lat, self.lon, self.ids = self.lat[urutan], self.lon[urutan], self.ids[urutan]
+        self._keys, self._starts = np.unique(codes[urutan], return_index=True)
+        self._ends = np.r_[self._starts[1:], len(urutan)].astype(np.int64)
+        self._key_iy, self._key_ix = np.divmod(self._keys, self._nlon)
+        # Rata-rata isi sel yang ditempati sebuah titik (berbobot jumlah titik)
+        isi = (self._ends - self._starts).astype(float)
+        self.occupancy = float((isi ** 2).sum() / isi.sum()) if len(isi) else 0.0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _col(self, lon):
+        # Kolom tanpa diputar; bisa negatif atau >= nlon untuk area yang melewati bujur 180
+        return np.floor((np.asarray(lon, dtype=float) + 180) / self._cell).astype(np.int64)
+
+    def _row(self, lat):
+        return np.clip(np.floor((np.asarray(lat, dtype=float) + 90) / self._cell).astype(np.int64), 0, self._nlat - 1)
+
+    def _grid(self, lat, lon):
+        return self._col(lon) % self._nlon, self._row(lat)
+
+    def _codes(self, ix, iy):
+        return iy * self._nlon + ix
+
+    def _window(self, lat, lon, radius_km):
+        """Kolom awal, jumlah kolom, baris awal dan baris akhir yang memuat lingkaran `radius_km`.
+
+        Lebar bujur maksimum sebuah tudung bola dengan sudut pusat r di lintang phi adalah
+        asin(sin r / cos phi). Jika tudung mencakup kutub atau lebarnya >= 180 derajat,
+        semua kolom diperiksa.
+        """
+        # Sedikit diperlebar agar titik tepat di tepi lingkaran tidak hilang karena pembulatan
+        r = radius_km / EARTH_RADIUS_KM * (1 + 1e-9) + 1e-12
+        dlat = np.degrees(min(r, np.pi))
+        phi = np.radians(lat)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rasio = np.sin(min(r, np.pi / 2)) / np.cos(phi)
+        penuh = (r >= np.pi) | (np.abs(lat) + dlat >= 90) | ~(rasio < 1)
+        dlon = np.degrees(np.arcsin(np.where(penuh, 0.0, rasio)))
+
+        ix0 = self._col(lon - dlon)
+        nx = self._col(lon + dlon) - ix0 + 1
+        penuh |= nx >= self._nlon
+        ix0 = np.where(penuh, 0, ix0)
+        nx = np.where(penuh, self._nlon, nx)
+        return ix0, nx, self._row(lat - dlat), self._row(lat + dlat)
+
+    def _candidates(self, lat, lon, radius_km):
+        """Pasangan (titik pusat, posisi titik) untuk semua titik di sel sekitar setiap pusat."""
+        ix0, nx, iy0, iy1 = self._window(lat, lon, radius_km)
+        ny = iy1 - iy0 + 1
+        sel = nx * ny
+
+        # Pusat dengan area kecil: sebutkan sel di sekitarnya lalu cari dengan searchsorted.
+        # Pusat dengan area sangat luas: periksa langsung semua sel yang ada.
+        kecil = np.flatnonzero(sel <= len(self._keys))
+        q = np.repeat(kecil, sel[kecil])
+        local = np.arange(len(q)) - np.repeat(np.cumsum(sel[kecil]) - sel[kecil], sel[kecil])
+        codes = self._codes((ix0[q] + local % nx[q]) % self._nlon, iy0[q] + local // nx[q])
+        pos = np.minimum(np.searchsorted(self._keys, codes), len(self._keys) - 1)
+        ada = self._keys[pos] == codes
+        q_cell, cell = q[ada], pos[ada]
+
+        luas = np.flatnonzero(sel > len(self._keys))
+        if len(luas):
+            q2 = np.repeat(luas, len(self._keys))
+            c2 = np.tile(np.arange(len(self._keys)), len(luas))
+            dalam = (((self._key_ix[c2] - ix0[q2]) % self._nlon < nx[q2])
+                     & (self._key_iy[c2] >= iy0[q2]) & (self._key_iy[c2] <= iy1[q2]))
+            q_cell, cell = np.r_[q_cell, q2[dalam]], np.r_[cell, c2[dalam]]
+
+        # Ekspansi sel -> titik di dalamnya
+        n = self._ends[cell] - self._starts[cell]
+        q_point = np.repeat(q_cell, n)
+        point = np.repeat(self._starts[cell], n) + np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+        return q_point, point
+
+    def query_radius(self, lat, lon, radius_km):
+        """Semua titik dalam `radius_km` dari setiap titik pusat."""
+        lat = np.atleast_1d(np.asarray(lat, dtype=float))
+        lon = np.atleast_1d(np.asarray(lon, dtype=float))
+        if len(self) == 0 or len(lat) == 0:
+            return np.empty(0, dtype=np.int64), self.ids[:0], np.empty(0)
+        hasil = []
+        for start in range(0, len(lat), QUERY_CHUNK):
+            stop = start + QUERY_CHUNK
+            q, point = self._candidates(lat[start:stop], lon[start:stop], radius_km)
+            q += start
+            jarak = haversine_km(lat[q], lon[q], self.lat[point], self.lon[point])
+            dalam = jarak <= radius_km
+            hasil.append((q[dalam], point[dalam], jarak[dalam]))
+        q, point, jarak = (np.concatenate(parts) for parts in zip(*hasil))
+        urutan = np.lexsort((jarak, q))
+        return q[urutan], self.ids[point[urutan]], jarak[urutan]
+
+    def nearest(self, lat, lon, k=1):
+        """`k` titik terdekat untuk setiap titik pusat.
+
+        Radius pencarian digandakan hanya untuk pusat yang belum mendapat `k` titik, sampai
+        mencakup seluruh bola bumi. query_radius memeriksa semua sel yang bersinggungan dengan
+        lingkaran (termasuk melewati bujur 180 dan kutub) dan titik di dalam radius selalu lebih
+        dekat daripada titik di luarnya, sehingga hasilnya eksak.
+        """
+        lat = np.atleast_1d(np.asarray(lat, dtype=float))
+        lon = np.atleast_1d(np.asarray(lon, dtype=float))
+        k = min(k, len(self))
+        hasil = []
+        sisa = np.arange(len(lat))
+        # Radius awal yang kira-kira memuat k titik pada kepadatan yang umum
+        radius = self.cell_km * np.sqrt(k / (np.pi * max(self.occupancy, 1.0)))
+        while len(sisa) and k > 0:
+            q, ids, jarak = self.query_radius(lat[sisa], lon[sisa], radius)
+            jumlah = np.bincount(q, minlength=len(sisa))
+            # Radius tak hingga memeriksa semua titik, jadi setiap pusat pasti selesai
+            cukup = (jumlah >= k) | (radius == np.inf)
+            # Hasil terurut per pusat lalu jarak: ambil k baris pertama setiap pusat yang cukup
+            rank = np.arange(len(q)) - np.repeat(np.cumsum(jumlah) - jumlah, jumlah)
+            pilih = cukup[q] & (rank < k)
+            hasil.append((sisa[q[pilih]], ids[pilih], jarak[pilih]))
+            sisa = sisa[~cukup]
+            radius = radius * 2 if radius * 2 < MAX_RADIUS_KM else np.inf
+
+        if not hasil:
+            return np.empty(0, dtype=np.int64), self.ids[:0], np.empty(0)
+        q, ids, jarak = (np.concatenate(parts) for parts in zip(*hasil))
+        urutan = np.lexsort((jarak, q))
+        return q[urutan], ids[urutan], jarak[urutan]
+
+
+def build_location_index(dim_lokasi):
+    """Indeks spasial atas tabel dimensi lokasi; id titik adalah 'Lokasi ID'."""
+    return GeoIndex(dim_lokasi[COORD_COLS[0]], dim_lokasi[COORD_COLS[1]], ids=dim_lokasi.index.to_numpy())
@@ -0,0 +1,111 @@
+from collections import Counter
+
+import pandas as pd
+
+# Label yang dianggap sebagai nilai kosong pada kolom kategorikal
+MISSING_LABELS = ['Tidak Diketahui', '', 'unknown', 'Unknown']
+CATEGORICAL_COLS = ['Jenis Transaksi', 'Plat Nomor', 'Sopir', 'Order']
+# Kolom frekuensi pada tabel statistik hasil category_counts()
+COUNT_COL = 'n'
+
+
+def missing_mask(series):
+    """Baris yang kosong, 'Tidak Diketahui', '' atau 'unknown' (tanpa membedakan huruf)."""
+    return series.isna() | (series == 'Tidak Diketahui') | (series == '') | (series.str.lower() == 'unknown')
+
+
+def known_mask(series):
+    """Baris yang bisa dipakai sebagai kunci pencocokan baris mirip."""
+    return series.notna() & ~series.isin(MISSING_LABELS)
+
+
+def _count_table(valid, keys, col, weights=None):
+    # Frekuensi nilai `col` per kombinasi kunci, dihitung sekali dengan groupby
+    table = {}
+    grouped = valid.groupby(keys + [col], sort=False, observed=True)
+    counts = grouped.size() if weights is None else grouped[weights].sum()
+    for key, n in counts.items():
+        table.setdefault(key[:-1], Counter())[key[-1]] += n
+    return table
+
+
+def category_counts(df, categorical_cols=CATEGORICAL_COLS):
+    """Frekuensi setiap kombinasi nilai kategorikal, sebagai statistik imputasi yang tersimpan.
+
+    Tabel ini bisa dijumlahkan antar batch (lihat combine_counts) dan dipakai sebagai
+    `prior` di impute_categoricals untuk membersihkan data baru tanpa membaca riwayatnya.
+    """
+    cols = [c for c in categorical_cols if c in df.columns]
+    data = df[cols].astype(object)
+    return data.groupby(cols, sort=False).size().rename(COUNT_COL).reset_index()
+
+
+def combine_counts(*tables):
+    tables = [t for t in tables if t is not None]
+    cols = [c for c in tables[0].columns if c != COUNT_COL]
+    combined = pd.concat(tables, ignore_index=True)
+    return combined.groupby(cols, sort=False)[COUNT_COL].sum().reset_index()
+
+
+def _mode(counts):
+    # Nilai paling sering; jika seri, nilai terkecil (sama seperti Series.mode().iloc[0])
+    if not counts:
+        return None
+    top = max(counts.values())
+    return min(v for v, n in counts.items() if n == top)
+
+
+def impute_categoricals(df, categorical_cols=CATEGORICAL_COLS, prior=None):
+    """Isi nilai kosong kategorikal dengan modus baris mirip, atau modus kolom sebagai cadangan.
+
+    Baris "mirip" adalah baris yang nilainya sama pada semua kolom kategorikal lain yang
+    diketahui. Tabel frekuensi dibangun sekali per pola kolom yang diketahui lalu diperbarui
+    setiap kali sebuah sel diisi, sehingga hasilnya sama dengan pengisian baris per baris
+    (isian sebelumnya ikut dihitung) tanpa memfilter ulang seluruh tabel untuk setiap sel.
+
+    `prior` (hasil category_counts dari data yang sudah bersih) ikut dihitung sebagai baris
+    mirip, sehingga batch baru diisi dengan statistik riwayat.
+    """
+    df = df.copy()
+    cols = [c for c in categorical_cols if c in df.columns]
+    for col in cols:
+        mask_na = missing_mask(df[col])
+        if not mask_na.any():
+            continue
+
+        others = [c for c in cols if c != col]
+        valid = df[~mask_na]
+        prior_valid = prior[~missing_mask(prior[col])] if prior is not None and col in prior.columns else None
+        known = pd.DataFrame({c: known_mask(df[c]) for c in others}, index=df.index)[mask_na]
+        patterns = list(known.itertuples(index=False, name=None))
+        pattern_keys = {p: tuple(c for c, k in zip(others, p) if k) for p in set(patterns)}
+
+        # Satu tabel frekuensi per pola kolom yang diketahui, ditambah modus seluruh kolom
+        tables = {keys: _count_table(valid, list(keys), col) for keys in set(pattern_keys.values()) if keys}
+        global_counts = Counter(valid[col].value_counts(sort=False).to_dict())
+        if prior_valid is not None:
+            for keys, table in tables.items():
+                for key, counts in _count_table(prior_valid, list(keys), col, COUNT_COL).items():
+                    table.setdefault(key, Counter()).update(counts)
+            global_counts.update(prior_valid.groupby(col, sort=False)[COUNT_COL].sum().to_dict())
+
+        rows = df.loc[mask_na, others].to_dict('index')
+        fills = []
+        for (idx, row), pattern in zip(rows.items(), patterns):
+            keys = pattern_keys[pattern]
+            val = None
+            if keys:
+                val = _mode(tables[keys].get(tuple(row[c] for c in keys)))
+            if val is None:
+                val = _mode(global_counts)
+            if val is None:
+                fills.append('Tidak Diketahui')
+                continue
+            fills.append(val)
+            # Isian ini ikut dihitung untuk sel kosong berikutnya
+            global_counts[val] += 1
+            for table_keys, table in tables.items():
+                table.setdefault(tuple(row[c] for c in table_keys), Counter())[val] += 1
+
+        df.loc[mask_na, col] = fills
+    return df
@@ -0,0 +1,236 @@
+"""Penambahan batch transaksi baru (Excel / CSV) tanpa membersihkan ulang seluruh riwayat.
+
+Batch dibersihkan sendiri dengan statistik imputasi yang dipelajari dari data yang sudah
+bersih, lalu kubus agregat dan statistik tersebut diperbarui dengan menambahkan bagian
+batch saja. Hasilnya disimpan di INGEST_DIR:
+
+    manifest.json        batch yang sudah masuk (file, sha256, jumlah baris, waktu)
+    batches/<key>.arrow  baris batch yang sudah bersih
+    stats-<versi>.arrow  frekuensi kombinasi kategorikal (statistik imputasi)
+    cube-<versi>.arrow   kubus agregat untuk workbook + semua batch
+
+Contoh (mis. dijalankan tiap malam):
+    python ingest.py data/masuk/2025-01.csv data/masuk/2025-02.xlsx
+    python ingest.py --list
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from cube import build_cube, merge_cubes
+from imputation import category_counts, combine_counts
+from pipeline import (CATEGORICAL_COLS, DATA_SOURCE, KEUANGAN_COLS, SHEET_KEUANGAN, build_dataset, clean_keuangan,
+                      concat_compact, validate_columns)
+from quality import combine_profiles, from_records, to_records
+from snapshot import SNAPSHOT_VERSION, file_sha256, fingerprint_key, pa, read_table, write_table
+
+INGEST_DIR = os.environ.get('DASHBOARD_INGEST_DIR', '.cache/ingest')
+MANIFEST = 'manifest.json'
+
+
+def read_batch(path):
+    """Membaca satu batch transaksi dari CSV atau dari sheet transaksi sebuah file Excel."""
+    if path.lower().endswith('.csv'):
+        df = pd.read_csv(path)
+    else:
+        df = pd.read_excel(path, sheet_name=SHEET_KEUANGAN)
+    validate_columns(df, KEUANGAN_COLS, path)
+    return df[KEUANGAN_COLS]
+
+
+def load_manifest(ingest_dir=INGEST_DIR):
+    try:
+        with open(os.path.join(ingest_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'base': None, 'versi': None, 'rows': 0, 'batches': []}
+
+
+def manifest_mtime(ingest_dir=INGEST_DIR):
+    """mtime manifest (None jika belum ada), untuk mendeteksi batch baru."""
+    try:
+        return os.stat(os.path.join(ingest_dir, MANIFEST)).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _versi(base_key, batches):
+    if not batches:
+        return base_key
+    return fingerprint_key({'base': base_key, 'batches': [b['sha256'] for b in batches], 'version': SNAPSHOT_VERSION})
+
+
+def _add_reports(*reports):
+    total = {}
+    for report in reports:
+        for col, n in report.items():
+            total[col] = total.get(col, 0) + n
+    return total
+
+
+def _read_batches(manifest, ingest_dir):
+    return [read_table(os.path.join(ingest_dir, b['data'])) for b in manifest['batches']]
+
+
+def apply_batches(df_keuangan, missing_report, profil_awal, base_key, ingest_dir=INGEST_DIR):
+    """Data workbook ditambah semua batch di manifest.
+
+    Mengembalikan (df_keuangan, missing_report, profil_awal, df_cube, versi_data). df_cube
+    berisi kubus tersimpan jika masih cocok dengan workbook ini, atau None jika harus dibangun ulang.
+    """
+    manifest = load_manifest(ingest_dir)
+    if not manifest['batches'] or pa is None:
+        return df_keuangan, missing_report, profil_awal, None, base_key
+
+    df_keuangan = concat_compact([df_keuangan] + _read_batches(manifest, ingest_dir))
+    missing_report = _add_reports(missing_report, *(b['missing_report'] for b in manifest['batches']))
+    profil_awal = combine_profiles(profil_awal, *(from_records(b.get('profile')) for b in manifest['batches']))
+
+    df_cube = None
+    if manifest['base'] == base_key:
+        try:
+            df_cube = read_table(os.path.join(ingest_dir, manifest['cube']))
+        except (OSError, KeyError, pa.ArrowException):
+            df_cube = None
+    return df_keuangan, missing_report, profil_awal, df_cube, _versi(base_key, manifest['batches'])
+
+
+def _replace_file(path, write):
+    # File Arrow dibaca lewat memory map: jangan ditimpa di tempat, tulis file baru lalu ganti namanya
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', dir=directory)
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def _write_manifest(manifest, path):
+    with open(path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+
+def _write_state(ingest_dir, manifest, stats, df_cube):
+    # File statistik dan kubus diberi nama per versi; manifest ditulis terakhir secara atomik
+    versi = manifest['versi']
+    manifest['stats'] = f'stats-{versi}.arrow'
+    manifest['cube'] = f'cube-{versi}.arrow'
+    _replace_file(os.path.join(ingest_dir, manifest['stats']), lambda p: write_table(stats, p))
+    _replace_file(os.path.join(ingest_dir, manifest['cube']), lambda p: write_table(df_cube, p))
+    _replace_file(os.path.join(ingest_dir, MANIFEST), lambda p: _write_manifest(manifest, p))
+
+    for name in os.listdir(ingest_dir):
+        if name.endswith('.arrow') and name not in (manifest['stats'], manifest['cube']):
+            os.remove(os.path.join(ingest_dir, name))
+
+
+def _base_state(manifest, df_base, base_key, ingest_dir):
+    """Statistik dan kubus untuk workbook + batch lama; dihitung ulang hanya jika workbook berubah."""
+    if manifest['base'] == base_key and manifest.get('stats'):
+        try:
+            return (read_table(os.path.join(ingest_dir, manifest['stats'])),
+                    read_table(os.path.join(ingest_dir, manifest['cube'])))
+        except (OSError, pa.ArrowException):
+            pass
+    history = concat_compact([df_base] + _read_batches(manifest, ingest_dir))
+    return category_counts(history, CATEGORICAL_COLS), build_cube(history)
+
+
+def ingest_batches(paths, source=DATA_SOURCE, ingest_dir=INGEST_DIR):
+    """Membersihkan dan menambahkan batch baru; batch yang sudah pernah masuk dilewati.
+
+    Mengembalikan satu hasil per file: status 'ok', 'dilewati' atau 'gagal' (batch yang
+    gagal dibaca tidak menghentikan batch lain).
+    """
+    if pa is None:
+        raise RuntimeError('Ingest batch membutuhkan pyarrow.')
+    os.makedirs(os.path.join(ingest_dir, 'batches'), exist_ok=True)
+
+    df_base, _, _, _, fingerprint, _ = build_dataset(source)
+    base_key = fingerprint_key(fingerprint)
+    manifest = load_manifest(ingest_dir)
+    stats, df_cube = _base_state(manifest, df_base, base_key, ingest_dir)
+    manifest['base'] = base_key
+    rows = len(df_base) + sum(b['rows'] for b in manifest['batches'])
+    del df_base
+
+    ingested = {b['sha256'] for b in manifest['batches']}
+    results = []
+    for path in paths:
+        start = time.perf_counter()
+        try:
+            sha = file_sha256(path)
+            if sha in ingested:
+                results.append({'file': path, 'status': 'dilewati', 'rows': 0})
+                continue
+            df_batch, report, profil = clean_keuangan(read_batch(path), prior=stats)
+        except Exception as e:
+            results.append({'file': path, 'status': 'gagal', 'error': str(e)})
+            continue
+
+        data = os.path.join('batches', f'{sha[:24]}.arrow')
+        _replace_file(os.path.join(ingest_dir, data), lambda p: write_table(df_batch, p))
+        # Hanya bagian batch yang dihitung; riwayat tidak dibaca ulang
+        stats = combine_counts(stats, category_counts(df_batch, CATEGORICAL_COLS))
+        df_cube = merge_cubes(df_cube, build_cube(df_batch), rows)
+        rows += len(df_batch)
+        ingested.add(sha)
+        manifest['batches'].append({
+            'file': os.path.abspath(path),
+            'sha256': sha,
+            'rows': len(df_batch),
+            'missing_report': report,
+            'profile': to_records(profil),
+            'data': data,
+            'ingested_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        })
+        results.append({'file': path, 'status': 'ok', 'rows': len(df_batch),
+                        'seconds': round(time.perf_counter() - start, 3)})
+
+    versi = _versi(base_key, manifest['batches'])
+    if versi != manifest['versi'] or not manifest.get('stats'):
+        manifest['rows'] = rows
+        manifest['versi'] = versi
+        _write_state(ingest_dir, manifest, stats, df_cube)
+    return results
+
+
+def reset(ingest_dir=INGEST_DIR):
+    """Menghapus semua batch yang sudah masuk."""
+    shutil.rmtree(ingest_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Menambahkan batch transaksi baru ke dataset dasbor.')
+    parser.add_argument('paths', nargs='*', help='File batch (.csv atau .xlsx)')
+    parser.add_argument('--source', default=DATA_SOURCE, help='Workbook utama, direktori atau pola glob')
+    parser.add_argument('--ingest-dir', default=INGEST_DIR)
+    parser.add_argument('--list', action='store_true', help='Tampilkan batch yang sudah masuk')
+    parser.add_argument('--reset', action='store_true', help='Hapus semua batch yang sudah masuk')
+    args = parser.parse_args(argv)
+
+    if args.reset:
+        reset(args.ingest_dir)
+    if args.paths:
+        for result in ingest_batches(args.paths, args.source, args.ingest_dir):
+            detail = result.get('error') or f"{result['rows']:,} baris"
+            print(f"{result['status']:>8}  {result['file']}  ({detail})")
+    if args.list or not (args.paths or args.reset):
+        manifest = load_manifest(args.ingest_dir)
+        for batch in manifest['batches']:
+            print(f"{batch['ingested_at']}  {batch['rows']:>8,}  {batch['file']}")
+        print(f"Total {manifest['rows']:,} baris, versi {manifest['versi']}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
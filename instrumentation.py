@@ -0,0 +1,144 @@
+"""Pengukuran waktu per bagian dasbor untuk satu rerun.
+
+Aktif hanya jika diminta (environment DASHBOARD_METRICS=1 atau query ?diagnostik=1).
+Saat nonaktif, span() mengembalikan objek kosong bersama sehingga biayanya hanya satu
+pemanggilan fungsi. Hasil setiap rerun ditambahkan ke file JSON lines.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+METRICS_FILE = os.environ.get('DASHBOARD_METRICS_FILE', '.cache/metrics.jsonl')
+
+# Setiap sesi Streamlit berjalan di thread sendiri, jadi pencatat disimpan per thread
+_local = threading.local()
+_file_lock = threading.Lock()
+
+
+def env_enabled():
+    return os.environ.get('DASHBOARD_METRICS', '') not in ('', '0', 'false')
+
+
+class Span:
+    """Satu bagian yang diukur: waktu, jumlah baris dan status cache (hit / miss)."""
+
+    __slots__ = ('name', 'rows', 'cache', 'seconds', '_start', '_recorder')
+
+    def __init__(self, recorder, name, rows=None, cached=False):
+        self.name = name
+        self.rows = rows
+        self.cache = 'hit' if cached else None
+        self.seconds = None
+        self._recorder = recorder
+        self._start = None
+
+    def start(self):
+        self._recorder.stack.append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def stop(self, **fields):
+        self.seconds = time.perf_counter() - self._start
+        self.set(**fields)
+        if self._recorder.stack and self._recorder.stack[-1] is self:
+            self._recorder.stack.pop()
+        self._recorder.spans.append(self)
+
+    def set(self, **fields):
+        for key, value in fields.items():
+            setattr(self, key, value)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+class _NullSpan:
+    # Dipakai saat instrumentasi nonaktif: semua operasi tidak melakukan apa-apa
+    def start(self):
+        return self
+
+    def stop(self, **fields):
+        pass
+
+    def set(self, **fields):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class RerunMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = []
+        self.stack = []
+        self.counters = {}
+
+
+def start_rerun(enabled):
+    """Mulai mencatat rerun ini jika `enabled`; jika tidak, semua span menjadi no-op."""
+    _local.recorder = RerunMetrics() if enabled else None
+
+
+def current():
+    return getattr(_local, 'recorder', None)
+
+
+def span(name, rows=None, cached=False):
+    """Span untuk bagian `name`; `cached=True` berarti hit kecuali note_cache_miss() dipanggil."""
+    recorder = current()
+    if recorder is None:
+        return NULL_SPAN
+    return Span(recorder, name, rows, cached)
+
+
+def note_cache_miss():
+    """Dipanggil dari dalam fungsi ber-cache: body-nya hanya jalan saat cache miss."""
+    recorder = current()
+    if recorder is not None and recorder.stack:
+        recorder.stack[-1].cache = 'miss'
+
+
+def count(name, n=1):
+    recorder = current()
+    if recorder is not None:
+        recorder.counters[name] = recorder.counters.get(name, 0) + n
+
+
+def finish_rerun(metrics_file=METRICS_FILE, **context):
+    """Menutup rerun: mengembalikan ringkasannya dan menambahkannya ke file metrik."""
+    recorder = current()
+    if recorder is None:
+        return None
+    _local.recorder = None
+    record = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+        'total_seconds': round(time.perf_counter() - recorder.started, 6),
+        **context,
+        'spans': [
+            {'name': s.name, 'seconds': round(s.seconds, 6), 'rows': s.rows, 'cache': s.cache}
+            for s in recorder.spans
+        ],
+        'counters': recorder.counters,
+    }
+    if metrics_file:
+        try:
+            os.makedirs(os.path.dirname(metrics_file) or '.', exist_ok=True)
+            line = json.dumps(record, default=str)
+            with _file_lock, open(metrics_file, 'a') as f:
+                f.write(line + '\n')
+        except OSError:
+            pass
+    return record
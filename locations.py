@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+
+LOKASI_ID = 'Lokasi ID'
+COORD_COLS = ['Latitude', 'Longitude']
+CARA = 'Cara'
+SKOR = 'Skor'
+# Skor minimum (koefisien Dice trigram huruf) agar nama Order dianggap sama dengan sebuah lokasi
+FUZZY_THRESHOLD = 0.75
+# Kandidat lokasi per nama Order yang dinilai penuh setelah tahap blocking
+FUZZY_CANDIDATES = 5
+# Trigram yang dimiliki lebih dari 2% lokasi (minimal 50 lokasi) tidak dipakai untuk mencari kandidat
+BLOCK_MAX_SHARE = 0.02
+BLOCK_MIN_LOCATIONS = 50
+
+
+def build_location_dim(df_lokasi):
+    """Tabel dimensi lokasi dengan kunci integer 'Lokasi ID'.
+
+    Nama lokasi ganda hanya diambil baris pertamanya agar setiap nama punya satu kunci.
+    """
+    dim = df_lokasi[['Nama Lokasi'] + COORD_COLS].dropna(subset=['Nama Lokasi'])
+    dim = dim.drop_duplicates(subset='Nama Lokasi').reset_index(drop=True)
+    dim.index.name = LOKASI_ID
+    return dim
+
+
+def normalize_names(names):
+    """Kunci nama untuk pencocokan: huruf kecil, tanpa aksen dan tanda baca, spasi tunggal."""
+    return (pd.Series(names, dtype=object).astype(str)
+            .str.normalize('NFKD').str.replace('[\u0300-\u036f]', '', regex=True)
+            .str.casefold().str.replace(r'[\W_]+', ' ', regex=True).str.strip())
+
+
+def _trigrams(keys):
+    # Trigram huruf unik per kunci (diberi spasi di awal/akhir agar awal kata lebih berbobot)
+    ids, grams = [], []
+    for i, key in enumerate(keys):
+        padded = f'  {key} '
+        unik = {padded[j:j + 3] for j in range(len(padded) - 2)}
+        ids.extend([i] * len(unik))
+        grams.extend(unik)
+    return np.asarray(ids, dtype=np.int64), grams
+
+
+def _expand(starts, counts):
+    # Posisi starts[i] .. starts[i] + counts[i] - 1 untuk semua i, tanpa loop Python
+    return np.repeat(starts, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+
+def fuzzy_match(keys, ref_keys, threshold=FUZZY_THRESHOLD):
+    """Posisi kunci referensi yang paling mirip untuk setiap kunci (-1 jika tidak ada) beserta skornya.
+
+    Kandidat dicari lewat trigram yang jarang (blocking) sehingga tidak semua pasangan
+    dibandingkan; hanya FUZZY_CANDIDATES kandidat teratas yang dinilai dengan koefisien
+    Dice atas semua trigram. Kecocokan yang seri antara dua lokasi tidak dipakai.
+    """
+    posisi = np.full(len(keys), -1, dtype=np.int64)
+    skor = np.zeros(len(keys))
+    if len(keys) == 0 or len(ref_keys) == 0:
+        return posisi, skor
+    q, q_grams = _trigrams(keys)
+    r, r_grams = _trigrams(ref_keys)
+    codes, _ = pd.factorize(np.asarray(q_grams + r_grams, dtype=object))
+    q_code, r_code = codes[:len(q)].astype(np.int64), codes[len(q):].astype(np.int64)
+    n_grams = int(codes.max()) + 1
+    n_query = np.bincount(q, minlength=len(keys))
+    n_ref = np.bincount(r, minlength=len(ref_keys))
+
+    # Blocking: pasangan kandidat hanya lewat trigram yang dimiliki sedikit lokasi
+    jarang = np.bincount(r_code, minlength=n_grams)[r_code] <= max(BLOCK_MIN_LOCATIONS, BLOCK_MAX_SHARE * len(ref_keys))
+    urutan = np.argsort(r_code[jarang], kind='stable')
+    blok_code, blok_ref = r_code[jarang][urutan], r[jarang][urutan]
+    awal = np.searchsorted(blok_code, q_code, side='left')
+    jumlah = np.searchsorted(blok_code, q_code, side='right') - awal
+    pasangan = np.repeat(q, jumlah) * len(ref_keys) + blok_ref[_expand(awal, jumlah)]
+    pasangan, bersama = np.unique(pasangan, return_counts=True)
+    if len(pasangan) == 0:
+        return posisi, skor
+    # FUZZY_CANDIDATES kandidat dengan trigram jarang bersama terbanyak per kunci
+    kq, kr = np.divmod(pasangan, len(ref_keys))
+    urutan = np.lexsort((-bersama, kq))
+    kq, kr = kq[urutan], kr[urutan]
+    per_kunci = np.bincount(kq, minlength=len(keys))
+    rank = np.arange(len(kq)) - np.repeat(np.cumsum(per_kunci) - per_kunci, per_kunci)
+    kq, kr = kq[rank < FUZZY_CANDIDATES], kr[rank < FUZZY_CANDIDATES]
+
+    # Dice penuh hanya untuk pasangan kandidat: trigram kunci yang juga ada di lokasi kandidat
+    ref_set = np.sort(r * n_grams + r_code)
+    q_awal = np.searchsorted(q, np.arange(len(keys)))
+    baris = np.repeat(np.arange(len(kq)), n_query[kq])
+    dicari = kr[baris] * n_grams + q_code[_expand(q_awal[kq], n_query[kq])]
+    ada = ref_set[np.minimum(np.searchsorted(ref_set, dicari), len(ref_set) - 1)] == dicari
+    sama = np.bincount(baris[ada], minlength=len(kq))
+    dice = 2 * sama / (n_query[kq] + n_ref[kr])
+
+    # Terbaik dan kedua terbaik per kunci; kecocokan yang seri ditolak
+    urutan = np.lexsort((-dice, kq))
+    kq, kr, dice = kq[urutan], kr[urutan], dice[urutan]
+    pertama = np.flatnonzero(np.r_[True, kq[1:] != kq[:-1]])
+    ada_kedua = np.r_[pertama[1:], len(kq)] - pertama > 1
+    kedua = np.where(ada_kedua, dice[np.minimum(pertama + 1, len(kq) - 1)], 0.0)
+    terima = (dice[pertama] >= threshold) & (dice[pertama] > kedua)
+    posisi[kq[pertama[terima]]] = kr[pertama[terima]]
+    skor[kq[pertama]] = dice[pertama]
+    return posisi, skor
+
+
+def match_orders(orders, dim_lokasi):
+    """Pencocokan nama Order -> 'Lokasi ID' per nilai unik Order, bukan per baris transaksi.
+
+    Berurutan: nama persis sama ('tepat'), kunci nama yang dinormalisasi ('normalisasi'),
+    lalu kemiripan trigram untuk sisanya ('fuzzy'). Mengembalikan tabel berindeks nama
+    Order dengan kolom 'Lokasi ID' (<NA> jika 'tidak cocok'), 'Cara' dan 'Skor'.
+    """
+    names = orders.cat.categories if isinstance(orders.dtype, pd.CategoricalDtype) else pd.Index(orders.dropna().unique())
+    lokasi = dim_lokasi['Nama Lokasi']
+    ids = np.array(pd.Series(dim_lokasi.index, index=lokasi).reindex(names), dtype=float)
+    cara = np.where(np.isnan(ids), 'tidak cocok', 'tepat').astype(object)
+    skor = np.where(np.isnan(ids), 0.0, 1.0)
+
+    sisa = np.flatnonzero(np.isnan(ids))
+    if len(sisa):
+        # Kunci ganda di sheet lokasi: baris pertama yang dipakai
+        ref = pd.Series(dim_lokasi.index, index=normalize_names(lokasi).to_numpy())
+        ref = ref[~ref.index.duplicated()]
+        keys = normalize_names(names[sisa])
+        found = ref.reindex(keys.to_numpy()).to_numpy(dtype=float)
+        ids[sisa] = found
+        cara[sisa[~np.isnan(found)]] = 'normalisasi'
+        skor[sisa[~np.isnan(found)]] = 1.0
+
+        sisa, keys = sisa[np.isnan(found)], keys[np.isnan(found)]
+        posisi, nilai = fuzzy_match(keys.tolist(), ref.index.tolist())
+        cocok = posisi >= 0
+        ids[sisa[cocok]] = ref.to_numpy()[posisi[cocok]]
+        cara[sisa[cocok]] = 'fuzzy'
+        skor[sisa] = nilai
+
+    return pd.DataFrame({
+        LOKASI_ID: pd.array(ids).astype('Int32'),
+        CARA: cara,
+        SKOR: skor,
+    }, index=pd.Index(names, name='Order'))
+
+
+def order_location_ids(orders, dim_lokasi):
+    """Pemetaan nama Order -> 'Lokasi ID' (<NA> jika tidak cocok dengan sheet lokasi)."""
+    return match_orders(orders, dim_lokasi)[LOKASI_ID]
+
+
+def attach_coordinates(agg, dim_lokasi, order_lokasi, order_col='Order'):
+    """Menambahkan Latitude/Longitude ke tabel agregat lewat kunci integer lokasi."""
+    ids = agg[order_col].map(order_lokasi).astype('Int32')
+    valid = ids.notna().to_numpy()
+    coords = np.full((len(agg), len(COORD_COLS)), np.nan)
+    coords[valid] = dim_lokasi[COORD_COLS].to_numpy(dtype=float)[ids[valid].to_numpy(dtype=np.int64)]
+    return agg.assign(**{LOKASI_ID: ids}, **{col: coords[:, i] for i, col in enumerate(COORD_COLS)})
@@ -0,0 +1,101 @@
+"""Agregasi spasial di server untuk peta pengiriman.
+
+Peta menggambar satu titik per lokasi selama jumlahnya tidak melebihi MAX_MAP_POINTS.
+Jika lebih, lokasi dikelompokkan ke sel grid (proyeksi Web Mercator) yang lebarnya
+mengikuti tingkat zoom peta; setiap sel digambar sebagai satu titik berisi jumlah volume,
+order dan pemasukan. Jika sel pada zoom itu masih terlalu banyak, grid diperkasar satu
+tingkat zoom demi satu tingkat, sehingga ukuran figur peta tetap terbatas berapa pun
+banyaknya toko.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from cube import COUNT, rollup
+
+MAX_MAP_POINTS = int(os.environ.get('DASHBOARD_MAP_POINTS', '1500'))
+DEFAULT_ZOOM = 10
+JUMLAH_ORDER = 'Jumlah Order'
+JUMLAH_LOKASI = 'Jumlah Lokasi'
+MAP_MEASURES = ['Volume (L)', 'Pemasukan', JUMLAH_ORDER]
+# Lebar satu sel dalam piksel layar; peta web memakai ubin 256 piksel per tingkat zoom
+CELL_PIXELS = 32
+
+
+def map_points(df_pengiriman):
+    """Satu titik per (Latitude, Longitude, Order) dengan jumlah volume, pemasukan dan order."""
+    df_map = rollup(df_pengiriman, ['Latitude', 'Longitude', 'Order'])[['Volume (L)', 'Pemasukan', COUNT]]
+    return df_map.rename(columns={COUNT: JUMLAH_ORDER}).reset_index()
+
+
+def cell_degrees(zoom):
+    """Lebar sel grid dalam derajat bujur pada tingkat zoom peta web."""
+    return 360.0 / 2 ** zoom * CELL_PIXELS / 256
+
+
+def _mercator_y(lat):
+    # Koordinat y Web Mercator dalam satuan derajat, agar sel tetap persegi di layar
+    lat = np.radians(np.clip(lat, -85.05, 85.05))
+    return np.degrees(np.log(np.tan(np.pi / 4 + lat / 2)))
+
+
+def grid_indices(points, zoom):
+    """Indeks kolom dan baris sel grid setiap titik pada tingkat zoom `zoom`.
+
+    Grid zoom yang lebih rendah didapat dengan menggeser indeks ke kanan (ix >> k), karena
+    lebar sel berlipat dua setiap turun satu tingkat zoom.
+    """
+    size = cell_degrees(zoom)
+    ix = np.floor(points['Longitude'].to_numpy(dtype=float) / size).astype(np.int64)
+    iy = np.floor(_mercator_y(points['Latitude'].to_numpy(dtype=float)) / size).astype(np.int64)
+    return ix, iy
+
+
+def _cells(ix, iy):
+    # Nomor sel 0..n-1 untuk setiap titik
+    ix = ix - ix.min()
+    iy = iy - iy.min()
+    codes, cell = np.unique(iy * (ix.max() + 1) + ix, return_inverse=True)
+    return cell, len(codes)
+
+
+def aggregate_cells(points, cell, n):
+    """Ringkasan per sel: jumlah volume, pemasukan, order dan lokasi.
+
+    Posisi sel adalah rata-rata koordinat lokasi di dalamnya dengan bobot jumlah order;
+    label sel adalah lokasi dengan volume terbesar ditambah jumlah lokasi lainnya.
+    """
+    sums = {m: np.bincount(cell, weights=points[m].to_numpy(dtype=float), minlength=n) for m in MAP_MEASURES}
+    weights = points[JUMLAH_ORDER].to_numpy(dtype=float)
+    lokasi = np.bincount(cell, minlength=n)
+
+    # Lokasi dengan volume terbesar di setiap sel: urutkan per sel lalu ambil yang pertama
+    urutan = np.lexsort((-points['Volume (L)'].to_numpy(dtype=float), cell))
+    pertama = urutan[np.flatnonzero(np.r_[True, np.diff(cell[urutan]) != 0])]
+    label = points['Order'].to_numpy(dtype=object)[pertama].astype(str)
+    lainnya = np.char.add(np.char.add(' (+', (lokasi - 1).astype(str)), ' lokasi)')
+    label = np.where(lokasi > 1, np.char.add(label, lainnya), label)
+
+    return pd.DataFrame({
+        'Latitude': np.bincount(cell, weights=points['Latitude'].to_numpy(dtype=float) * weights, minlength=n) / sums[JUMLAH_ORDER],
+        'Longitude': np.bincount(cell, weights=points['Longitude'].to_numpy(dtype=float) * weights, minlength=n) / sums[JUMLAH_ORDER],
+        'Order': label,
+        'Volume (L)': sums['Volume (L)'],
+        'Pemasukan': sums['Pemasukan'],
+        JUMLAH_ORDER: sums[JUMLAH_ORDER].astype(np.int64),
+        JUMLAH_LOKASI: lokasi,
+    })
+
+
+def level_of_detail(points, zoom=DEFAULT_ZOOM, max_points=MAX_MAP_POINTS):
+    """Titik yang digambar di peta dan zoom grid yang dipakai (None jika tidak dikelompokkan)."""
+    if len(points) <= max_points:
+        return points, None
+    ix, iy = grid_indices(points, zoom)
+    # Hanya jumlah sel yang dihitung per tingkat; agregasi dilakukan sekali pada tingkat terpilih
+    for shift in range(zoom + 1):
+        cell, n = _cells(ix >> shift, iy >> shift)
+        if n <= max_points:
+            break
+    return aggregate_cells(points, cell, n), zoom - shift
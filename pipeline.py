@@ -0,0 +1,233 @@
+import glob
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from imputation import impute_categoricals
+from quality import missing_counts, profile
+from snapshot import load_snapshot, save_snapshot, sources_fingerprint
+
+# Nama file Excel dan sheet yang dipakai dasbor
+FILE_PATH = 'Dataset Keuangan Truk Air Isi Ulang 2024.xlsx'
+# Sumber data: satu file, direktori berisi workbook (mis. per tahun / per depo) atau pola glob
+DATA_SOURCE = os.environ.get('DASHBOARD_DATA', FILE_PATH)
+# Jumlah proses untuk membaca banyak workbook sekaligus (1 = berurutan)
+_CPUS = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+LOAD_WORKERS = int(os.environ.get('DASHBOARD_LOAD_WORKERS', _CPUS))
+WORKBOOK_SUFFIXES = ('.xlsx', '.xlsm', '.xls')
+SHEET_KEUANGAN = 'Dataset Keuangan Truk Air Isi U'
+SHEET_LOKASI = 'lokasi'
+
+NUMERIC_COLS = ['Pemasukan', 'Pengeluaran', 'Volume (L)', 'Jumlah']
+CATEGORICAL_COLS = ['Jenis Transaksi', 'Plat Nomor', 'Sopir', 'Order']
+REPORT_COLS = NUMERIC_COLS + CATEGORICAL_COLS
+# Kolom wajib pada sheet transaksi (dan pada batch tambahan)
+KEUANGAN_COLS = ['No', 'Tanggal', 'Sopir', 'Plat Nomor', 'Order', 'Volume (L)', 'Pemasukan', 'Pengeluaran',
+                 'Jenis Transaksi', 'Jumlah', 'Keterangan']
+LOKASI_COLS = ['Nama Lokasi', 'Latitude', 'Longitude']
+# Batas baris satu sheet Excel (termasuk header)
+XLSX_MAX_ROWS = 1_048_575
+
+
+def resolve_sources(source=DATA_SOURCE):
+    """Daftar workbook (terurut) dari satu file, sebuah direktori, atau pola glob."""
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)
+                 if name.lower().endswith(WORKBOOK_SUFFIXES) and not name.startswith('~$')]
+    elif glob.has_magic(source):
+        paths = [p for p in glob.glob(source) if os.path.isfile(p)]
+    else:
+        return [source]
+    if not paths:
+        raise FileNotFoundError(f"Tidak ada workbook di '{source}'")
+    return sorted(paths)
+
+
+def source_stat(source=DATA_SOURCE):
+    """Ukuran dan mtime setiap workbook sumber, untuk mendeteksi perubahan tanpa membaca isinya."""
+    stats = []
+    for path in resolve_sources(source):
+        stat = os.stat(path)
+        stats.append((path, stat.st_size, stat.st_mtime_ns))
+    return tuple(stats)
+
+
+def read_workbook(file_path=FILE_PATH):
+    """Membaca sheet transaksi dan sheet lokasi dari satu file Excel (sekali buka) lalu memeriksa kolomnya."""
+    with pd.ExcelFile(file_path) as xls:
+        missing = [s for s in (SHEET_KEUANGAN, SHEET_LOKASI) if s not in xls.sheet_names]
+        if missing:
+            raise ValueError(f"{file_path}: sheet tidak ditemukan: {', '.join(missing)}")
+        df_keuangan = xls.parse(SHEET_KEUANGAN)
+        df_lokasi = xls.parse(SHEET_LOKASI)
+    validate_columns(df_keuangan, KEUANGAN_COLS, f"{file_path} [{SHEET_KEUANGAN}]")
+    validate_columns(df_lokasi, LOKASI_COLS, f"{file_path} [{SHEET_LOKASI}]")
+    return df_keuangan, df_lokasi
+
+
+def _read_source(path):
+    # Dijalankan di proses pekerja: kegagalan dikembalikan sebagai laporan, bukan exception
+    start = time.perf_counter()
+    try:
+        df_keuangan, df_lokasi = read_workbook(path)
+    except Exception as e:
+        return None, None, {'file': path, 'rows': 0, 'seconds': round(time.perf_counter() - start, 3), 'error': str(e)}
+    return df_keuangan, df_lokasi, {'file': path, 'rows': len(df_keuangan),
+                                    'seconds': round(time.perf_counter() - start, 3), 'error': None}
+
+
+def read_sources(paths, workers=LOAD_WORKERS):
+    """Membaca beberapa workbook secara paralel (process pool) dan menggabungkannya.
+
+    Parsing openpyxl terikat CPU dan GIL sehingga thread tidak membantu. File yang gagal
+    dibaca atau tidak sesuai skema dilewati dan dicatat di laporan per file; ValueError
+    hanya jika tidak ada satu pun file yang bisa dibaca.
+    """
+    results = None
+    if workers > 1 and len(paths) > 1:
+        # 'spawn' karena server Streamlit sudah multi-thread saat pool dibuat
+        context = multiprocessing.get_context('spawn')
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(paths)), mp_context=context) as pool:
+                results = list(pool.map(_read_source, paths))
+        except BrokenProcessPool:
+            # Proses pekerja mati (mis. kehabisan memori): ulangi berurutan di proses ini
+            results = None
+    if results is None:
+        results = [_read_source(p) for p in paths]
+
+    sources = [report for _, _, report in results]
+    loaded = [(k, l) for k, l, _ in results if k is not None]
+    if not loaded:
+        raise ValueError('Tidak ada workbook yang bisa dibaca: ' + '; '.join(r['error'] for r in sources))
+    if len(loaded) == 1:
+        return (*loaded[0], sources)
+    df_keuangan = pd.concat([k for k, _ in loaded], ignore_index=True)
+    df_lokasi = pd.concat([l for _, l in loaded], ignore_index=True)
+    return df_keuangan, df_lokasi, sources
+
+
+def validate_columns(df, required, source):
+    """ValueError jika `df` tidak memiliki semua kolom `required`."""
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        raise ValueError(f"{source}: kolom tidak ditemukan: {', '.join(missing)}")
+
+
+def clean_keuangan(df_keuangan, prior=None):
+    """Pembersihan data transaksi; mengembalikan data bersih, laporan missing values awal dan profil kualitas awal.
+
+    `prior` adalah statistik imputasi dari data historis (lihat imputation.category_counts).
+    """
+    # Profil kualitas data mentah (satu lintasan per kolom); laporan missing values diturunkan darinya
+    profil_awal = profile(df_keuangan, KEUANGAN_COLS)
+    missing_report = missing_counts(profil_awal, REPORT_COLS)
+
+    # Mengubah 'Tanggal' menjadi datetime
+    df_keuangan['Tanggal'] = pd.to_datetime(df_keuangan['Tanggal'], errors='coerce')
+
+    # Mengisi missing values numerik
+    for col in NUMERIC_COLS:
+        if col in df_keuangan.columns:
+            df_keuangan[col] = pd.to_numeric(df_keuangan[col], errors='coerce').fillna(0)
+
+    # Mengisi missing values kategorikal dengan kombinasi mirip atau modus
+    df_keuangan = impute_categoricals(df_keuangan, CATEGORICAL_COLS, prior)
+
+    # Menambahkan kolom 'Bulan' untuk analisis bulanan (kode periode bulanan, lihat bulan_labels)
+    df_keuangan['Bulan'] = bulan_codes(df_keuangan['Tanggal'])
+
+    # Terurut menurut tanggal agar filter rentang tanggal cukup memakai searchsorted
+    return sort_by_tanggal(compact_dtypes(df_keuangan)), missing_report, profil_awal
+
+
+def is_sorted_by_tanggal(df):
+    tanggal = df['Tanggal']
+    n = int(tanggal.notna().sum())
+    return bool(tanggal.iloc[:n].notna().all() and tanggal.iloc[:n].is_monotonic_increasing)
+
+
+def sort_by_tanggal(df):
+    """Urut stabil menurut 'Tanggal', tanggal kosong di akhir (lihat timeindex)."""
+    if is_sorted_by_tanggal(df):
+        return df
+    return df.sort_values('Tanggal', kind='stable', na_position='last', ignore_index=True)
+
+
+def bulan_codes(tanggal):
+    """Kode bulan berupa ordinal periode bulanan (Int32, <NA> untuk tanggal kosong)."""
+    ordinals = tanggal.dt.year * 12 + tanggal.dt.month - 1 - 1970 * 12
+    return ordinals.astype('Int32')
+
+
+def bulan_labels(codes, fmt='%Y-%m'):
+    """Label teks untuk kode bulan, misalnya '2024-01' atau 'Jan 2024'."""
+    return pd.PeriodIndex.from_ordinals(np.asarray(codes, dtype=np.int64), freq='M').strftime(fmt)
+
+
+def _downcast(series):
+    # Angka pecahan yang semuanya bulat disimpan sebagai integer; integer dipersempit selama muat
+    if pd.api.types.is_float_dtype(series) and np.isfinite(series).all() and (series % 1 == 0).all():
+        series = series.astype(np.int64)
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast='integer')
+    return series
+
+
+def compact_dtypes(df):
+    """Skema ringkas: kolom dimensi sebagai categorical dan kolom numerik dengan tipe tersempit."""
+    df = df.copy()
+    for col in CATEGORICAL_COLS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    for col in NUMERIC_COLS + ['No']:
+        if col in df.columns:
+            df[col] = _downcast(df[col])
+    return df
+
+
+def concat_compact(frames):
+    """Menggabungkan frame ringkas; kolom categorical memakai gabungan kategori yang terurut."""
+    frames = [df for df in frames if df is not None]
+    for col in CATEGORICAL_COLS:
+        if all(col in df.columns for df in frames):
+            values = pd.Index([]).append([pd.Index(df[col].astype('category').cat.categories) for df in frames])
+            dtype = pd.CategoricalDtype(values.unique().sort_values())
+            frames = [df.assign(**{col: df[col].astype(dtype)}) for df in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+def memory_report(frames):
+    """Jumlah baris dan memori (MB) per DataFrame, untuk ditampilkan di sidebar."""
+    rows = []
+    for name, df in frames.items():
+        rows.append({'Data': name, 'Baris': len(df), 'Memori (MB)': round(df.memory_usage(deep=True).sum() / 2**20, 3)})
+    return pd.DataFrame(rows)
+
+
+def build_dataset(source=DATA_SOURCE, use_snapshot=True, workers=LOAD_WORKERS):
+    """Data transaksi bersih, data lokasi, laporan missing values, profil kualitas awal, sidik sumber dan laporan per file.
+
+    `source` boleh berupa satu file, direktori atau pola glob; semua workbook digabung lalu
+    dibersihkan bersama. Hasil pembersihan disimpan sebagai snapshot kolumnar; selama file
+    Excel tidak berubah, snapshot tersebut yang dibaca sehingga openpyxl tidak dipanggil lagi.
+    """
+    paths = resolve_sources(source)
+    fingerprint = sources_fingerprint(source, paths)
+    if use_snapshot:
+        cached = load_snapshot(fingerprint)
+        if cached is not None:
+            df_keuangan, df_lokasi, missing_report, profil_awal, sources = cached
+            return df_keuangan, df_lokasi, missing_report, profil_awal, fingerprint, sources
+
+    df_keuangan, df_lokasi, sources = read_sources(paths, workers)
+    df_keuangan, missing_report, profil_awal = clean_keuangan(df_keuangan)
+
+    if use_snapshot:
+        save_snapshot(fingerprint, df_keuangan, df_lokasi, missing_report, sources=sources, profile=profil_awal)
+    return df_keuangan, df_lokasi, missing_report, profil_awal, fingerprint, sources
@@ -0,0 +1,134 @@
+"""Profil kualitas data per kolom, dihitung dalam satu lintasan per kolom.
+
+Setiap kolom difaktorkan sekali (atau memakai kode categorical yang sudah ada); semua
+pemeriksaan teks (label unknown, pola plat nomor, angka / tanggal yang tidak terbaca)
+dijalankan pada nilai uniknya saja lalu dikalikan frekuensinya, sehingga tidak ada
+konversi string atas seluruh tabel.
+
+Kolom profil:
+    Baris          jumlah baris
+    Kosong         nilai kosong (NaN / NaT)
+    Label Unknown  'Tidak Diketahui', 'unknown' atau '' (tanpa membedakan huruf besar)
+    Tidak Valid    kolom angka: teks yang bukan angka; 'Tanggal': teks yang bukan tanggal;
+                   'Plat Nomor': plat yang tidak sesuai pola (mis. 'H #### DD')
+    Unik           jumlah nilai berbeda (tanpa nilai kosong)
+    Min, Maks      rentang nilai kolom angka dan tanggal
+"""
+import numpy as np
+import pandas as pd
+
+SENTINELS = ['tidak diketahui', '', 'unknown']
+# Plat nomor Indonesia: kode wilayah, nomor, lalu huruf seri (mis. 'H 1234 CD')
+PLAT_PATTERN = r'^[A-Z]{1,2} \d{1,4} [A-Z]{1,3}$'
+NUMERIC_COLS = ['Pemasukan', 'Pengeluaran', 'Volume (L)', 'Jumlah', 'No']
+COUNT_COLS = ['Baris', 'Kosong', 'Label Unknown', 'Tidak Valid']
+PROFILE_COLS = ['Tipe'] + COUNT_COLS + ['Unik', 'Min', 'Maks']
+
+
+def _factorize(series):
+    # Kode per baris (-1 untuk kosong) dan nilai unik; categorical memakai kodenya sendiri
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), pd.Index(series.cat.categories)
+    codes, uniques = pd.factorize(series)
+    return codes, pd.Index(uniques)
+
+
+def _scalar(value):
+    # Nilai JSON-friendly: angka sebagai int/float, tanggal sebagai teks ISO
+    if value is None or pd.isna(value):
+        return None
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).strftime('%Y-%m-%d')
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def profile_column(series):
+    """Satu baris profil untuk satu kolom."""
+    codes, uniques = _factorize(series)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    ada = counts > 0
+    teks = pd.api.types.is_object_dtype(uniques.dtype) or pd.api.types.is_string_dtype(uniques.dtype)
+
+    unknown = np.zeros(len(uniques), dtype=bool)
+    if teks:
+        unknown = np.asarray(uniques.astype(str).str.lower().isin(SENTINELS), dtype=bool)
+    isi = ~unknown
+
+    tidak_valid = np.zeros(len(uniques), dtype=bool)
+    minimum = maksimum = None
+    name = series.name
+    if name in NUMERIC_COLS or pd.api.types.is_numeric_dtype(uniques.dtype):
+        angka = pd.to_numeric(uniques.to_series(), errors='coerce').to_numpy(dtype=float)
+        tidak_valid = np.isnan(angka) & isi
+        valid = ada & ~np.isnan(angka)
+        if valid.any():
+            minimum, maksimum = angka[valid].min(), angka[valid].max()
+            if (angka[valid] % 1 == 0).all():
+                minimum, maksimum = int(minimum), int(maksimum)
+    elif name == 'Tanggal' or pd.api.types.is_datetime64_any_dtype(uniques.dtype):
+        tanggal = pd.to_datetime(uniques.to_series(), errors='coerce')
+        tidak_valid = tanggal.isna().to_numpy() & isi
+        valid = ada & tanggal.notna().to_numpy()
+        if valid.any():
+            minimum, maksimum = tanggal[valid].min(), tanggal[valid].max()
+    elif name == 'Plat Nomor':
+        tidak_valid = ~np.asarray(uniques.astype(str).str.match(PLAT_PATTERN), dtype=bool) & isi
+
+    return {
+        'Tipe': str(series.dtype),
+        'Baris': len(series),
+        'Kosong': int((codes < 0).sum()),
+        'Label Unknown': int(counts[unknown].sum()),
+        'Tidak Valid': int(counts[tidak_valid].sum()),
+        'Unik': int(ada.sum()),
+        'Min': _scalar(minimum),
+        'Maks': _scalar(maksimum),
+    }
+
+
+def profile(df, cols=None):
+    """Profil kualitas untuk kolom `cols` (default semua kolom), berindeks nama kolom."""
+    cols = [c for c in (df.columns if cols is None else cols) if c in df.columns]
+    profil = pd.DataFrame([profile_column(df[c]) for c in cols], index=pd.Index(cols, name='Kolom'), columns=PROFILE_COLS)
+    return profil
+
+
+def missing_counts(profil, cols):
+    """Laporan missing values lama: nilai kosong + label unknown per kolom."""
+    return {c: int(profil.at[c, 'Kosong'] + profil.at[c, 'Label Unknown']) for c in cols if c in profil.index}
+
+
+def is_clean(profil, cols):
+    """True jika kolom `cols` tidak lagi berisi nilai kosong atau label unknown."""
+    return sum(missing_counts(profil, cols).values()) == 0
+
+
+def combine_profiles(*profiles):
+    """Profil gabungan beberapa bagian data (mis. workbook + batch ingest).
+
+    Jumlah dan rentang digabung secara eksak; 'Unik' diambil nilai terbesar antar bagian
+    (batas bawah), karena nilai unik antar bagian tidak disimpan.
+    """
+    profiles = [p for p in profiles if p is not None]
+    if len(profiles) == 1:
+        return profiles[0]
+    gabungan = pd.concat(profiles)
+    grouped = gabungan.groupby(level=0, sort=False)
+    hasil = grouped[COUNT_COLS].sum().assign(
+        Tipe=grouped['Tipe'].first(),
+        Unik=grouped['Unik'].max(),
+        Min=grouped['Min'].agg(lambda v: v.dropna().min() if v.notna().any() else None),
+        Maks=grouped['Maks'].agg(lambda v: v.dropna().max() if v.notna().any() else None),
+    )
+    return hasil[PROFILE_COLS]
+
+
+def to_records(profil):
+    """Profil sebagai list dict untuk disimpan di JSON (snapshot, manifest ingest)."""
+    return [{'Kolom': kolom, **{k: _scalar(v) for k, v in row.items()}} for kolom, row in profil.iterrows()]
+
+
+def from_records(records):
+    if not records:
+        return None
+    return pd.DataFrame(records).set_index('Kolom')[PROFILE_COLS]
@@ -0,0 +1,239 @@
+"""Laporan bulanan per sopir dan per armada, dibuat paralel tanpa Streamlit.
+
+Setiap laporan berisi KPI bulan itu, grafik harian Pemasukan / Pengeluaran / Laba Bersih,
+top 10 lokasi pengiriman, lalu peringkat sopir (laporan sopir) atau estimasi biaya
+perawatan armada (laporan armada). Semua angka dihitung lewat analytics.py dari kubus
+agregat yang sama dengan dasbor.
+
+Laporan dibagi ke beberapa proses (ProcessPoolExecutor). Dataset dimuat sekali di proses
+utama dan diwarisi proses pekerja lewat fork; pada platform tanpa fork setiap pekerja
+memuatnya sekali (dari snapshot), bukan sekali per laporan.
+
+Contoh:
+    python reports.py --bulan 2024-03 --output laporan
+    python reports.py --jenis armada --format png --workers 4
+
+Format gambar (png, svg, pdf) hanya berisi grafiknya dan membutuhkan paket kaleido.
+"""
+import argparse
+import html
+import importlib.util
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+
+import pandas as pd
+from plotly.offline import get_plotlyjs
+
+from analytics import (ESTIMASI_PERAWATAN, armada_valid, biaya_perawatan, frekuensi_armada, lokasi_pengiriman,
+                       pengiriman_kpi, peringkat_sopir, ringkasan_kpi, select, sopir_valid, top_lokasi_volume, tren,
+                       tugas_sopir)
+from charts import combo_figure, hbar_figure
+from cube import slice_cube, value_counts
+from dataset_store import load_dataset
+from ingest import INGEST_DIR
+from pipeline import DATA_SOURCE, bulan_labels
+
+# Jenis laporan -> dimensi kubus
+JENIS = {'sopir': 'Sopir', 'armada': 'Plat Nomor'}
+IMAGE_FORMATS = ['png', 'svg', 'pdf']
+FORMATS = ['html'] + IMAGE_FORMATS
+REPORT_DIR = 'laporan'
+PLOTLY_JS = 'plotly.min.js'
+
+# Dataset milik proses ini (diisi di proses utama atau oleh _init_worker)
+_dataset = None
+
+
+def _init_worker(source, ingest_dir):
+    global _dataset
+    if _dataset is None:
+        _dataset = load_dataset(source, ingest_dir=ingest_dir)
+
+
+def parse_bulan(text):
+    """'2024-03' -> kode bulan seperti kolom 'Bulan'."""
+    return pd.Period(text, freq='M').ordinal
+
+
+def report_tasks(dataset, jenis=tuple(JENIS), bulan=None):
+    """(jenis, nama, kode bulan) untuk setiap sopir / armada yang bertransaksi pada bulan itu.
+
+    `bulan` berisi kode bulan; default semua bulan yang ada di data.
+    """
+    cube = dataset.df_cube
+    if bulan is None:
+        bulan = sorted(cube['Bulan'].dropna().unique().tolist())
+    tasks = []
+    for kode in bulan:
+        cube_bulan = slice_cube(cube, {'Bulan': kode})
+        for j in jenis:
+            valid = sopir_valid(cube_bulan) if j == 'sopir' else armada_valid(cube_bulan)
+            tasks += [(j, str(nama), int(kode)) for nama in value_counts(valid, JENIS[j]).index]
+    return tasks
+
+
+def month_tables(dataset, bulan):
+    """Tabel tingkat bulan yang sama untuk semua laporan bulan itu: peringkat sopir dan biaya perawatan armada."""
+    cube_bulan = select(dataset, bulan=bulan).cube
+    perawatan = biaya_perawatan(armada_valid(cube_bulan))
+    perawatan.insert(1, 'Peringkat', range(1, len(perawatan) + 1))
+    return {
+        'peringkat': peringkat_sopir(sopir_valid(cube_bulan)),
+        'perawatan': perawatan,
+        'grafik_perawatan': hbar_figure(perawatan.head(8), ESTIMASI_PERAWATAN, 'Plat Nomor',
+                                        'Estimasi Biaya Perawatan per Armada'),
+    }
+
+
+@lru_cache(maxsize=4)
+def _month_tables(bulan):
+    # Laporan dibagi ke pekerja per potongan berurutan, sehingga satu bulan dihitung sekali per proses
+    return month_tables(_dataset, bulan)
+
+
+def build_report(dataset, jenis, nama, bulan, bulanan=None):
+    """Judul, tabel dan grafik satu laporan bulanan (tanpa menulis file).
+
+    `bulanan` adalah hasil month_tables() untuk bulan yang sama, jika sudah dihitung.
+    """
+    label_bulan = bulan_labels([bulan], '%B %Y')[0]
+    if bulanan is None:
+        bulanan = month_tables(dataset, bulan)
+    pilihan = select(dataset, bulan=bulan, **{'sopir' if jenis == 'sopir' else 'armada': nama})
+    kpi = {**ringkasan_kpi(pilihan.kpi), **pengiriman_kpi(pilihan.kpi)}
+    _, df_pengiriman = lokasi_pengiriman(pilihan.cube, dataset.df_lokasi, dataset.order_lokasi)
+    top_lokasi = top_lokasi_volume(df_pengiriman)
+
+    tabel = {'KPI': pd.DataFrame([kpi]), 'Top 10 Lokasi': top_lokasi}
+    grafik = {
+        'tren': combo_figure(tren(dataset, pilihan, 'D'), 'Hari',
+                             title=f'Pemasukan, Pengeluaran, dan Laba Bersih Harian - {nama}, {label_bulan}'),
+        'lokasi': hbar_figure(top_lokasi, 'Volume Air Terkirim (L)', 'Lokasi', 'Top 10 Lokasi - Volume Air Terkirim'),
+    }
+    if jenis == 'sopir':
+        # Peringkat di antara semua sopir pada bulan yang sama
+        peringkat = bulanan['peringkat']
+        tabel['Peringkat Sopir'] = peringkat[peringkat['Sopir'] == nama]
+        tabel['Semua Sopir'] = peringkat
+        tabel['Armada yang Dipakai'] = frekuensi_armada(armada_valid(pilihan.cube))
+    else:
+        perawatan = bulanan['perawatan']
+        tabel['Estimasi Biaya Perawatan'] = perawatan[perawatan['Plat Nomor'] == nama]
+        tabel['Semua Armada'] = perawatan
+        tabel['Sopir Armada Ini'] = tugas_sopir(sopir_valid(pilihan.cube))
+        grafik['perawatan'] = bulanan['grafik_perawatan']
+    return {'judul': f'Laporan {jenis.title()} {nama} - {label_bulan}', 'tabel': tabel, 'grafik': grafik}
+
+
+def _slug(nama):
+    return re.sub(r'[^0-9A-Za-z]+', '_', nama).strip('_') or 'tanpa_nama'
+
+
+def report_path(output, jenis, nama, bulan):
+    """Lokasi file laporan tanpa ekstensi: <output>/<YYYY-MM>/<jenis>/<nama>."""
+    return os.path.join(output, bulan_labels([bulan])[0], jenis, _slug(nama))
+
+
+def write_html(path, report, plotlyjs):
+    """Satu file HTML berisi tabel dan grafik interaktif; plotly.js dirujuk lewat `plotlyjs`."""
+    bagian = [f"<h1>{html.escape(report['judul'])}</h1>"]
+    for judul, df in report['tabel'].items():
+        bagian.append(f'<h2>{html.escape(judul)}</h2>')
+        angka = {c: '{:,.0f}'.format for c in df.columns if pd.api.types.is_numeric_dtype(df[c])}
+        bagian.append(df.to_html(index=False, border=0, classes='tabel', formatters=angka))
+    for i, fig in enumerate(report['grafik'].values()):
+        bagian.append(fig.to_html(full_html=False, include_plotlyjs=plotlyjs if i == 0 else False))
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<!DOCTYPE html>\n<html><head><meta charset="utf-8">'
+                f"<title>{html.escape(report['judul'])}</title>"
+                '<style>body{font-family:sans-serif;margin:2rem} .tabel td{text-align:right;padding:0 .6rem}</style>'
+                '</head><body>\n' + '\n'.join(bagian) + '\n</body></html>\n')
+
+
+def render_task(task, output, fmt='html'):
+    """Membuat dan menulis satu laporan; dijalankan di proses pekerja."""
+    jenis, nama, bulan = task
+    start = time.perf_counter()
+    base = report_path(output, jenis, nama, bulan)
+    try:
+        os.makedirs(os.path.dirname(base), exist_ok=True)
+        report = build_report(_dataset, jenis, nama, bulan, _month_tables(bulan))
+        if fmt == 'html':
+            files = [base + '.html']
+            plotlyjs = os.path.relpath(os.path.join(output, PLOTLY_JS), os.path.dirname(base))
+            write_html(files[0], report, plotlyjs)
+        else:
+            files = []
+            for name, fig in report['grafik'].items():
+                files.append(f'{base}_{name}.{fmt}')
+                fig.write_image(files[-1])
+    except Exception as e:
+        return {'file': base, 'status': 'gagal', 'error': str(e)}
+    return {'file': files[0], 'status': 'ok', 'files': len(files), 'seconds': round(time.perf_counter() - start, 3)}
+
+
+def generate_reports(dataset, tasks, output=REPORT_DIR, fmt='html', workers=None,
+                     source=DATA_SOURCE, ingest_dir=INGEST_DIR):
+    """Menulis semua laporan `tasks` secara paralel; satu hasil per laporan."""
+    global _dataset
+    _dataset = dataset
+    _month_tables.cache_clear()
+    os.makedirs(output, exist_ok=True)
+    if fmt == 'html':
+        # plotly.js ditulis sekali untuk semua laporan (bisa dibuka tanpa internet)
+        with open(os.path.join(output, PLOTLY_JS), 'w', encoding='utf-8') as f:
+            f.write(get_plotlyjs())
+
+    render = partial(render_task, output=output, fmt=fmt)
+    workers = min(workers or os.cpu_count() or 1, max(len(tasks), 1))
+    if workers <= 1:
+        return [render(task) for task in tasks]
+    # fork: pekerja mewarisi dataset proses utama tanpa memuat atau menyalinnya lagi
+    context = multiprocessing.get_context('fork') if 'fork' in multiprocessing.get_all_start_methods() else None
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                             initargs=(source, ingest_dir)) as pool:
+        return list(pool.map(render, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Membuat laporan bulanan per sopir dan per armada.')
+    parser.add_argument('--source', default=DATA_SOURCE, help='Workbook utama, direktori atau pola glob')
+    parser.add_argument('--ingest-dir', default=INGEST_DIR)
+    parser.add_argument('--bulan', nargs='+', help='Bulan laporan (YYYY-MM); default semua bulan')
+    parser.add_argument('--jenis', nargs='+', choices=list(JENIS), default=list(JENIS))
+    parser.add_argument('--nama', nargs='+', help='Hanya sopir / plat nomor ini')
+    parser.add_argument('--format', choices=FORMATS, default='html')
+    parser.add_argument('--workers', type=int, help='Jumlah proses (default: jumlah CPU)')
+    parser.add_argument('--output', default=REPORT_DIR)
+    args = parser.parse_args(argv)
+
+    if args.format in IMAGE_FORMATS and importlib.util.find_spec('kaleido') is None:
+        parser.error(f'format {args.format} membutuhkan paket kaleido (pip install kaleido)')
+    try:
+        bulan = None if args.bulan is None else [parse_bulan(b) for b in args.bulan]
+    except ValueError as e:
+        parser.error(f'bulan tidak valid: {e}')
+
+    start = time.perf_counter()
+    dataset = load_dataset(args.source, ingest_dir=args.ingest_dir)
+    tasks = report_tasks(dataset, args.jenis, bulan)
+    if args.nama:
+        tasks = [task for task in tasks if task[1] in args.nama]
+    results = generate_reports(dataset, tasks, args.output, args.format, args.workers, args.source, args.ingest_dir)
+
+    for result in results:
+        if result['status'] != 'ok':
+            print(f"{result['status']:>8}  {result['file']}  ({result['error']})")
+    ok = sum(result['status'] == 'ok' for result in results)
+    print(f'{ok:,} dari {len(results):,} laporan ditulis ke {args.output} '
+          f'dalam {time.perf_counter() - start:.2f} detik', file=sys.stderr)
+    return 0 if ok == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
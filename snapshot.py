@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+try:
+    import pyarrow as pa
+except ImportError:  # snapshot dinonaktifkan jika pyarrow tidak tersedia
+    pa = None
+
+from quality import from_records, to_records
+
+# Lokasi snapshot; bisa diganti lewat environment variable
+SNAPSHOT_DIR = os.environ.get('DASHBOARD_SNAPSHOT_DIR', '.cache/snapshots')
+# Naikkan jika langkah pembersihan berubah agar snapshot lama tidak dipakai lagi
+SNAPSHOT_VERSION = 5
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def workbook_fingerprint(path):
+    """Sidik file sumber: path, ukuran, mtime dan hash isi."""
+    stat = os.stat(path)
+    return {
+        'path': os.path.abspath(path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': file_sha256(path),
+        'version': SNAPSHOT_VERSION,
+    }
+
+
+def sources_fingerprint(source, paths):
+    """Sidik untuk satu workbook, atau untuk sekumpulan workbook dari direktori / pola glob."""
+    if list(paths) == [source]:
+        return workbook_fingerprint(source)
+    return {
+        'path': os.path.abspath(source),
+        'files': [workbook_fingerprint(p) for p in paths],
+        'version': SNAPSHOT_VERSION,
+    }
+
+
+def fingerprint_key(fingerprint):
+    return hashlib.sha256(json.dumps(fingerprint, sort_keys=True).encode()).hexdigest()[:24]
+
+
+def write_table(df, path):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def read_table(path):
+    # Arrow IPC tanpa kompresi bisa dibaca langsung lewat memory map
+    with pa.memory_map(path, 'r') as source:
+        return pa.ipc.open_file(source).read_all().to_pandas()
+
+
+def load_snapshot(fingerprint, snapshot_dir=SNAPSHOT_DIR):
+    """Membaca snapshot untuk sidik file ini, atau None jika belum ada / tidak valid."""
+    if pa is None:
+        return None
+    target = os.path.join(snapshot_dir, fingerprint_key(fingerprint))
+    try:
+        with open(os.path.join(target, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta['fingerprint'] != fingerprint:
+            return None
+        df_keuangan = read_table(os.path.join(target, 'keuangan.arrow'))
+        df_lokasi = read_table(os.path.join(target, 'lokasi.arrow'))
+    except (OSError, ValueError, KeyError, pa.ArrowException):
+        return None
+    return df_keuangan, df_lokasi, meta['missing_report'], from_records(meta.get('profile')), meta.get('sources', [])
+
+
+def save_snapshot(fingerprint, df_keuangan, df_lokasi, missing_report, snapshot_dir=SNAPSHOT_DIR, sources=None,
+                  profile=None):
+    """Menyimpan snapshot secara atomik dan menghapus snapshot lama dari file yang sama.
+
+    Kegagalan menulis (misalnya direktori read-only) diabaikan; dasbor tetap jalan tanpa snapshot.
+    """
+    if pa is None:
+        return False
+    key = fingerprint_key(fingerprint)
+    tmp_dir = None
+    try:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=f'.{key}-', dir=snapshot_dir)
+        write_table(df_keuangan, os.path.join(tmp_dir, 'keuangan.arrow'))
+        write_table(df_lokasi, os.path.join(tmp_dir, 'lokasi.arrow'))
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+            json.dump({'fingerprint': fingerprint, 'missing_report': missing_report, 'sources': sources or [],
+                       'profile': None if profile is None else to_records(profile)}, f)
+        target = os.path.join(snapshot_dir, key)
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp_dir, target)
+    except (OSError, pa.ArrowException):
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return False
+    _remove_stale(fingerprint['path'], key, snapshot_dir)
+    return True
+
+
+def _remove_stale(source_path, keep_key, snapshot_dir):
+    # Snapshot versi lama dari file sumber yang sama tidak akan dipakai lagi
+    for name in os.listdir(snapshot_dir):
+        if name == keep_key or name.startswith('.'):
+            continue
+        meta_path = os.path.join(snapshot_dir, name, 'meta.json')
+        try:
+            with open(meta_path) as f:
+                if json.load(f)['fingerprint']['path'] != source_path:
+                    continue
+        except (OSError, ValueError, KeyError):
+            continue
+        shutil.rmtree(os.path.join(snapshot_dir, name), ignore_errors=True)
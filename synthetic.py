@@ -0,0 +1,185 @@
+"""Generator dataset sintetis dengan skema yang sama seperti file Excel dasbor.
+
+Contoh:
+    python synthetic.py --rows 100000 --output data/sintetis.xlsx
+    python synthetic.py --rows 10000000 --output data/sintetis --format parquet
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from pipeline import SHEET_KEUANGAN, SHEET_LOKASI, XLSX_MAX_ROWS
+
+SOPIR_NAMES = ['Pak Joko', 'Pak Dedi', 'Pak Rudi', 'Pak Slamet', 'Pak Budi', 'Pak Eko', 'Pak Andi', 'Pak Hendra']
+EXPENSES = {
+    'Isi Solar': 'Biaya isi solar',
+    'Cuci Truk': 'Biaya cuci truk',
+    'Ganti Oli': 'Biaya ganti oli',
+    'Servis Mesin': 'Biaya servis mesin',
+    'Perbaikan Ban': 'Biaya perbaikan ban',
+}
+VOLUMES = [6000, 8000, 10000]
+LOCATION_PREFIXES = ['Toko', 'Depot Air', 'Warung', 'Rumah Makan']
+# Pusat sebaran lokasi pelanggan (sekitar Yogyakarta, seperti data asli)
+CENTER = (-7.85, 110.45)
+
+# Persentase nilai kosong / label tidak valid, mendekati data 2024
+DEFAULT_RATES = {
+    'tanggal_kosong': 0.005,
+    'plat_kosong': 0.01,
+    'plat_tersamar': 0.005,
+    'sopir_kosong': 0.005,
+    'order_kosong': 0.002,
+    'tidak_diketahui': 0.002,
+}
+
+
+def _names(prefix_list, n, start=1):
+    return [f'{prefix_list[i % len(prefix_list)]} {start + i}' for i in range(n)]
+
+
+def make_sopir(n):
+    return SOPIR_NAMES[:n] + [f'Pak Sopir {i}' for i in range(len(SOPIR_NAMES) + 1, n + 1)]
+
+
+def make_plat(n):
+    suffixes = ['AA', 'BB', 'CC', 'DD', 'XY', 'CD']
+    return [f'H {1000 + i * 7 % 9000} {suffixes[i % len(suffixes)]}' for i in range(n)]
+
+
+def generate_lokasi(n_locations, rng):
+    """Sheet 'lokasi': nama lokasi pelanggan beserta koordinat."""
+    return pd.DataFrame({
+        'Unnamed: 0': np.nan,
+        'Nama Lokasi': _names(LOCATION_PREFIXES, n_locations),
+        'Latitude': np.round(CENTER[0] + rng.normal(0, 0.08, n_locations), 4),
+        'Longitude': np.round(CENTER[1] + rng.normal(0, 0.12, n_locations), 4),
+    })
+
+
+def _with_missing(codes, labels, rng, kosong=0.0, tidak_diketahui=0.0, extra=None):
+    # Kode -1 menjadi NaN; label tambahan (mis. 'Tidak Diketahui') disisipkan sebagai kategori
+    labels = list(labels)
+    codes = codes.copy()
+    draw = rng.random(len(codes))
+    codes[draw < kosong] = -1
+    marks = {'Tidak Diketahui': tidak_diketahui, **(extra or {})}
+    threshold = kosong
+    for label, rate in marks.items():
+        if rate <= 0:
+            continue
+        labels.append(label)
+        codes[(draw >= threshold) & (draw < threshold + rate)] = len(labels) - 1
+        threshold += rate
+    return pd.Categorical.from_codes(codes, categories=labels)
+
+
+def generate_keuangan(rows, n_drivers=8, n_trucks=6, n_locations=8, years=1, start='2024-01-01', rates=None, seed=0):
+    """Sheet transaksi sintetis; kolom dimensi dikembalikan sebagai Categorical agar hemat memori."""
+    rng = np.random.default_rng(seed)
+    rates = {**DEFAULT_RATES, **(rates or {})}
+
+    start = pd.Timestamp(start)
+    days = (start + pd.DateOffset(years=years) - start).days
+    tanggal = start + pd.to_timedelta(np.sort(rng.integers(0, days, rows)), unit='D')
+    tanggal = pd.Series(tanggal).mask(rng.random(rows) < rates['tanggal_kosong'])
+
+    is_income = rng.random(rows) < 0.73
+    expense_codes = rng.integers(0, len(EXPENSES), rows)
+    order_codes = np.where(is_income, rng.integers(0, n_locations, rows), n_locations + expense_codes)
+    order_labels = _names(LOCATION_PREFIXES, n_locations) + list(EXPENSES)
+    keterangan_labels = ['Pembayaran lunas'] + list(EXPENSES.values())
+
+    pemasukan = np.where(is_income, rng.integers(285_000, 400_000, rows), 0)
+    pengeluaran = np.where(is_income, 0, rng.integers(50_000, 250_000, rows))
+    volume_labels = [str(v) for v in VOLUMES] + ['-']
+    volume_codes = np.where(is_income, rng.integers(0, len(VOLUMES), rows), len(VOLUMES))
+
+    plat = make_plat(n_trucks)
+    plat_codes = rng.integers(0, n_trucks, rows)
+    # Plat yang tersamar di sumber data, mis. 'H #### AA'
+    masked_labels = sorted({f"H #### {p.split()[-1]}" for p in plat})
+    masked = {label: rates['plat_tersamar'] / len(masked_labels) for label in masked_labels}
+
+    return pd.DataFrame({
+        'No': np.arange(1, rows + 1),
+        'Tanggal': tanggal,
+        'Sopir': _with_missing(rng.integers(0, n_drivers, rows), make_sopir(n_drivers), rng, rates['sopir_kosong'], rates['tidak_diketahui']),
+        'Plat Nomor': _with_missing(plat_codes, plat, rng, rates['plat_kosong'], rates['tidak_diketahui'], masked),
+        'Order': _with_missing(order_codes, order_labels, rng, rates['order_kosong'], rates['tidak_diketahui']),
+        'Volume (L)': pd.Categorical.from_codes(volume_codes, categories=volume_labels),
+        'Pemasukan': pemasukan,
+        'Pengeluaran': pengeluaran,
+        'Jenis Transaksi': pd.Categorical.from_codes((~is_income).astype(np.int8), categories=['Pemasukan', 'Pengeluaran']),
+        'Jumlah': pemasukan - pengeluaran,
+        'Keterangan': pd.Categorical.from_codes(np.where(is_income, 0, 1 + expense_codes), categories=keterangan_labels),
+    })
+
+
+def as_excel_frame(df_keuangan):
+    """Bentuk kolom seperti hasil pd.read_excel: teks biasa, Volume campuran angka dan '-'."""
+    df = df_keuangan.copy()
+    for col in df.select_dtypes('category').columns:
+        df[col] = df[col].astype(object)
+    df['Volume (L)'] = df['Volume (L)'].map(lambda v: v if v == '-' else int(v))
+    return df
+
+
+def write_dataset(path, df_keuangan, df_lokasi, fmt='xlsx'):
+    """Menulis dataset sebagai workbook (dua sheet) atau sepasang file Parquet.
+
+    Untuk Parquet, `path` adalah direktori berisi keuangan.parquet dan lokasi.parquet.
+    Kolom teks ditulis sebagai string biasa agar terbaca sama seperti dari Excel.
+    """
+    if fmt == 'xlsx':
+        if len(df_keuangan) > XLSX_MAX_ROWS:
+            raise ValueError(f'Excel hanya menampung {XLSX_MAX_ROWS:,} baris per sheet; gunakan format parquet.')
+        with pd.ExcelWriter(path, engine='openpyxl') as writer:
+            as_excel_frame(df_keuangan).to_excel(writer, sheet_name=SHEET_KEUANGAN, index=False)
+            df_lokasi.to_excel(writer, sheet_name=SHEET_LOKASI, index=False)
+    elif fmt == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        os.makedirs(path, exist_ok=True)
+        for name, df in (('keuangan', df_keuangan), ('lokasi', df_lokasi)):
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            for i, field in enumerate(table.schema):
+                if pa.types.is_dictionary(field.type):
+                    table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+            pq.write_table(table, os.path.join(path, f'{name}.parquet'))
+    else:
+        raise ValueError(f"Format tidak dikenal: {fmt!r} (pilih 'xlsx' atau 'parquet')")
+
+
+def read_parquet_dataset(path):
+    """Membaca pasangan file Parquet hasil write_dataset(fmt='parquet')."""
+    df_keuangan = pd.read_parquet(os.path.join(path, 'keuangan.parquet'))
+    df_lokasi = pd.read_parquet(os.path.join(path, 'lokasi.parquet'))
+    return df_keuangan, df_lokasi
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Membuat dataset keuangan truk air sintetis.')
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--drivers', type=int, default=8)
+    parser.add_argument('--trucks', type=int, default=6)
+    parser.add_argument('--locations', type=int, default=8)
+    parser.add_argument('--years', type=int, default=1)
+    parser.add_argument('--start', default='2024-01-01')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--format', choices=['xlsx', 'parquet'], default='xlsx')
+    parser.add_argument('--output', required=True)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    df_lokasi = generate_lokasi(args.locations, rng)
+    df_keuangan = generate_keuangan(args.rows, args.drivers, args.trucks, args.locations, args.years, args.start, seed=args.seed)
+    write_dataset(args.output, df_keuangan, df_lokasi, args.format)
+    print(f'{len(df_keuangan):,} transaksi dan {len(df_lokasi):,} lokasi ditulis ke {args.output}')
+
+
+if __name__ == '__main__':
+    main()
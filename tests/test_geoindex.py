@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from geoindex import MAX_RADIUS_KM, GeoIndex, haversine_km
+
+
+def brute_radius(index, lat, lon, radius_km):
+    jarak = haversine_km(lat[:, None], lon[:, None], index.lat[None, :], index.lon[None, :])
+    q, point = np.nonzero(jarak <= radius_km)
+    urutan = np.lexsort((jarak[q, point], q))
+    return q[urutan], index.ids[point[urutan]], jarak[q, point][urutan]
+
+
+def brute_nearest(index, lat, lon, k):
+    jarak = haversine_km(lat[:, None], lon[:, None], index.lat[None, :], index.lon[None, :])
+    k = min(k, len(index))
+    point = np.argsort(jarak, axis=1, kind='stable')[:, :k]
+    q = np.repeat(np.arange(len(lat)), k)
+    return q, index.ids[point.ravel()], np.take_along_axis(jarak, point, axis=1).ravel()
+
+
+def assert_same(result, expected):
+    np.testing.assert_array_equal(result[0], expected[0])
+    np.testing.assert_array_equal(result[1], expected[1])
+    np.testing.assert_allclose(result[2], expected[2])
+
+
+def points(kind, n, rng):
+    if kind == 'global':
+        # Seragam di permukaan bola
+        return np.degrees(np.arcsin(rng.uniform(-1, 1, n))), rng.uniform(-180, 180, n)
+    if kind == 'cluster':
+        return rng.normal(-7.0, 0.05, n), rng.normal(110.4, 0.05, n)
+    if kind == 'antimeridian':
+        return rng.uniform(-30, 30, n), (rng.uniform(170, 190, n) + 180) % 360 - 180
+    if kind == 'kutub':
+        return rng.uniform(50, 90, n), rng.uniform(-180, 180, n)
+    raise ValueError(kind)
+
+
+@pytest.mark.parametrize('kind', ['global', 'cluster', 'antimeridian', 'kutub'])
+@pytest.mark.parametrize('radius_km', [1.0, 50.0, 500.0, 3000.0, 12000.0, MAX_RADIUS_KM])
+def test_query_radius(kind, radius_km):
+    rng = np.random.default_rng(7)
+    lat, lon = points(kind, 2000, rng)
+    index = GeoIndex(lat, lon)
+    q_lat, q_lon = points(kind, 100, rng)
+    q_lat = np.r_[q_lat, 55.0, 55.0, 89.9, -89.9, 0.0, 0.0]
+    q_lon = np.r_[q_lon, 179.9, -179.9, 0.0, 45.0, 180.0, -180.0]
+    assert_same(index.query_radius(q_lat, q_lon, radius_km), brute_radius(index, q_lat, q_lon, radius_km))
+
+
+@pytest.mark.parametrize('kind', ['global', 'cluster', 'antimeridian', 'kutub'])
+@pytest.mark.parametrize('k', [1, 5, 400, 5000])
+def test_nearest(kind, k):
+    rng = np.random.default_rng(11)
+    lat, lon = points(kind, 2000, rng)
+    index = GeoIndex(lat, lon)
+    # Pusat di mana saja, termasuk jauh dari semua titik
+    q_lat, q_lon = points('global', 50, rng)
+    q_lat = np.r_[q_lat, 55.0, 89.9, 0.0]
+    q_lon = np.r_[q_lon, 179.9, 0.0, -180.0]
+    assert_same(index.nearest(q_lat, q_lon, k), brute_nearest(index, q_lat, q_lon, k))
+
+
+def test_antimeridian():
+    index = GeoIndex([0.0, 10.0], [-170.0, -160.0])
+    q, ids, jarak = index.nearest([0.0], [110.0], 1)
+    assert ids.tolist() == [0]
+    q, ids, jarak = index.query_radius([0.0], [175.0], 2000)
+    assert ids.tolist() == [0]
+    assert jarak[0] == pytest.approx(1668, abs=1)
+
+
+def test_empty_and_missing_coordinates():
+    index = GeoIndex([np.nan, 1.0], [2.0, np.nan], ids=np.array(['a', 'b']))
+    assert len(index) == 0
+    q, ids, jarak = index.nearest([0.0], [0.0], 3)
+    assert len(q) == len(ids) == len(jarak) == 0
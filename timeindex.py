@@ -0,0 +1,46 @@
+"""Filter rentang tanggal dengan pencarian biner pada data yang terurut menurut 'Tanggal'.
+
+Data transaksi disimpan terurut (tanggal kosong di akhir, lihat pipeline.sort_by_tanggal),
+sehingga rentang tanggal mana pun cukup dipotong dengan dua kali searchsorted tanpa
+memindai seluruh riwayat.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _values(tanggal):
+    # Tanpa salinan: array datetime64 milik kolom itu sendiri
+    return tanggal.to_numpy()
+
+
+def _point(value, values):
+    return pd.Timestamp(value).normalize().to_datetime64().astype(values.dtype)
+
+
+def valid_rows(values):
+    """Jumlah baris bertanggal; NaT terurut di akhir sehingga cukup satu searchsorted."""
+    return int(np.searchsorted(values, np.datetime64('NaT'), side='left'))
+
+
+def date_bounds(tanggal):
+    """Tanggal pertama dan terakhir (sebagai date), atau (None, None) jika tidak ada tanggal."""
+    values = _values(tanggal)
+    n = valid_rows(values)
+    if n == 0:
+        return None, None
+    return pd.Timestamp(values[0]).date(), pd.Timestamp(values[n - 1]).date()
+
+
+def date_range_rows(tanggal, start, end):
+    """Potongan baris (slice) untuk tanggal start..end, keduanya inklusif (per hari)."""
+    values = _values(tanggal)
+    n = valid_rows(values)
+    lo = np.searchsorted(values[:n], _point(start, values), side='left')
+    hi = np.searchsorted(values[:n], _point(pd.Timestamp(end) + pd.Timedelta(days=1), values), side='left')
+    return slice(int(lo), int(max(lo, hi)))
+
+
+def week_bounds(day):
+    """Senin sampai Minggu dari minggu yang memuat `day`."""
+    start = pd.Timestamp(day).normalize() - pd.Timedelta(days=pd.Timestamp(day).weekday())
+    return start.date(), (start + pd.Timedelta(days=6)).date()
@@ -0,0 +1,121 @@
+"""Deret waktu harian, mingguan dan bulanan per Sopir dan Plat Nomor.
+
+Tabel harian dibangun sekali per versi data dari baris transaksi; tabel mingguan dan
+bulanan diturunkan dari tabel harian tanpa menyentuh baris transaksi lagi. Kode periode
+berupa integer: hari sejak 1970-01-01, minggu (Senin) sejak epoch dan ordinal bulan yang
+sama dengan kolom 'Bulan'.
+"""
+import numpy as np
+import pandas as pd
+
+from cube import COUNT
+from pipeline import bulan_labels
+
+PERIODE = 'Periode'
+SERIES_DIMS = ['Sopir', 'Plat Nomor']
+SERIES_MEASURES = ['Pemasukan', 'Pengeluaran', 'Volume (L)']
+LABA = 'Laba Bersih'
+
+# Pilihan di UI -> kode granularitas
+GRANULARITAS = {'Harian': 'D', 'Mingguan': 'W', 'Bulanan': 'M'}
+# Nama kolom label dan satuan periode untuk judul grafik
+LABEL_COL = {'D': 'Tanggal', 'W': 'Minggu', 'M': 'Bulan'}
+SATUAN = {'D': 'Hari', 'W': 'Minggu', 'M': 'Bulan'}
+
+
+def day_codes(tanggal):
+    """Nomor hari sejak 1970-01-01 (Int32, <NA> untuk tanggal kosong)."""
+    days = tanggal.to_numpy().astype('datetime64[D]')
+    codes = pd.array(days.astype(np.int64), dtype='Int64')
+    codes[np.isnat(days)] = pd.NA
+    return pd.Series(codes, index=tanggal.index).astype('Int32')
+
+
+def date_day(value):
+    """Nomor hari untuk satu tanggal (mis. batas rentang dari date_input)."""
+    return int(np.datetime64(pd.Timestamp(value).date(), 'D').astype(np.int64))
+
+
+def to_period(days, freq):
+    """Kode hari -> kode periode: hari ('D'), minggu mulai Senin ('W') atau bulan ('M')."""
+    days = np.asarray(days, dtype=np.int64)
+    if freq == 'D':
+        return days
+    if freq == 'W':
+        # 1970-01-01 jatuh pada hari Kamis; +3 membuat minggu dimulai hari Senin
+        return (days + 3) // 7
+    return days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+
+
+def period_start(codes, freq):
+    """Tanggal awal setiap kode periode."""
+    codes = np.asarray(codes, dtype=np.int64)
+    if freq == 'D':
+        days = codes
+    elif freq == 'W':
+        days = codes * 7 - 3
+    else:
+        return codes.astype('datetime64[M]').astype('datetime64[D]')
+    return days.astype('datetime64[D]')
+
+
+def period_labels(codes, freq):
+    """Label teks periode: '05 Mar 2024', Senin awal minggu, atau 'Mar 2024'."""
+    if freq == 'M':
+        return bulan_labels(codes, '%b %Y')
+    return pd.DatetimeIndex(period_start(codes, freq)).strftime('%d %b %Y')
+
+
+def build_daily(df):
+    """Tabel harian per Sopir dan Plat Nomor; transaksi tanpa tanggal tidak masuk deret."""
+    data = df[SERIES_DIMS + SERIES_MEASURES].assign(**{PERIODE: day_codes(df['Tanggal'])})
+    aggregations = {m: (m, 'sum') for m in SERIES_MEASURES}
+    aggregations[COUNT] = ('Pemasukan', 'size')
+    return data.groupby([PERIODE] + SERIES_DIMS, observed=True).agg(**aggregations).reset_index()
+
+
+def coarsen(daily, freq):
+    """Tabel periode `freq` yang diturunkan dari tabel harian."""
+    if freq == 'D':
+        return daily
+    table = daily.assign(**{PERIODE: to_period(daily[PERIODE], freq)})
+    return table.groupby([PERIODE] + SERIES_DIMS, observed=True)[SERIES_MEASURES + [COUNT]].sum().reset_index()
+
+
+def build_series(df):
+    """Tabel deret untuk semua granularitas, dibangun sekali per versi data."""
+    daily = build_daily(df)
+    return {freq: coarsen(daily, freq) for freq in GRANULARITAS.values()}
+
+
+def series(tables, freq, filters, days=None, by=None):
+    """Deret Pemasukan, Pengeluaran, Laba Bersih dan Volume per periode, terurut kronologis.
+
+    `filters` memakai kunci yang sama dengan kubus ('Bulan', 'Sopir', 'Plat Nomor'); `days`
+    adalah rentang kode hari (awal, akhir) inklusif. Jika ada filter waktu, deret dihitung
+    dari tabel harian yang sudah dipotong; jika tidak, tabel periode yang sudah jadi dipakai.
+    `by` menambahkan dimensi (mis. 'Plat Nomor') di samping periode.
+    """
+    bulan = filters.get('Bulan')
+    if bulan is not None or days is not None:
+        daily = tables['D']
+        hari = daily[PERIODE].to_numpy(dtype=np.int64)
+        mask = np.ones(len(daily), dtype=bool)
+        if bulan is not None:
+            mask &= to_period(hari, 'M') == bulan
+        if days is not None:
+            mask &= (hari >= days[0]) & (hari <= days[1])
+        table = coarsen(daily[mask], freq)
+    else:
+        table = tables[freq]
+
+    mask = np.ones(len(table), dtype=bool)
+    for dim in SERIES_DIMS:
+        value = filters.get(dim)
+        if value is not None:
+            mask &= (table[dim] == value).to_numpy(dtype=bool, na_value=False)
+    keys = [PERIODE] + ([by] if by else [])
+    result = table[mask].groupby(keys, observed=True)[SERIES_MEASURES + [COUNT]].sum().reset_index()
+    result[LABA] = result['Pemasukan'] - result['Pengeluaran']
+    result.insert(0, LABEL_COL[freq], period_labels(result[PERIODE], freq))
+    return result